@@ -1,37 +1,142 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from core.database import get_db
-from core.security import decode_access_token
-from crud.user import get_user_by_username
+from typing import Tuple
+from core.database import get_db, get_async_db, SessionLocal, ReplicaSessionLocal, replica_engine
+from core.principal_cache import principal_cache, UserSnapshot
+from core.rate_limit import RateLimitExceeded, rate_limiter, retry_after_header
+from core.replica import READ_ROUTING, mark_writer, write_tracker
+from core.security import decode_access_token_payload
+from crud.user import get_user_by_username, get_user_by_username_async
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    token = credentials.credentials
-    username = decode_access_token(token)
-    if username is None:
+def _decode_token(token: str) -> dict:
+    payload = decode_access_token_payload(token)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный токен",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user = get_user_by_username(db, username=username)
+    return payload
+
+def _check_user(user) -> UserSnapshot:
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Пользователь не найден",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Пользователь неактивен"
         )
-    
-    return user
\ No newline at end of file
+
+    return UserSnapshot.from_user(user)
+
+def _remember(token: str, payload: dict, snapshot: UserSnapshot, version: int) -> UserSnapshot:
+    principal_cache.put(token, snapshot, version, expires_at=payload.get("exp"))
+    return snapshot
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> UserSnapshot:
+    token = credentials.credentials
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+
+    payload = _decode_token(token)
+    version = principal_cache.version(payload["sub"])
+    user = get_user_by_username(db, username=payload["sub"])
+    return _remember(token, payload, _check_user(user), version)
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserSnapshot:
+    token = credentials.credentials
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+
+    payload = _decode_token(token)
+    version = principal_cache.version(payload["sub"])
+    user = await get_user_by_username_async(db, username=payload["sub"])
+    return _remember(token, payload, _check_user(user), version)
+
+
+def read_session_factory(user_id: int):
+    """
+    Фабрика сессий чтения: реплика, если пользователь ничего не записывал последние
+    READ_YOUR_WRITES_WINDOW секунд, иначе основная БД — чтобы он видел свои изменения
+    """
+    use_primary = replica_engine is None or write_tracker.recent(user_id)
+    READ_ROUTING.inc("primary" if use_primary else "replica")
+    return SessionLocal if use_primary else ReplicaSessionLocal
+
+def get_read_db(current_user: UserSnapshot = Depends(get_current_user)):
+    # Сессия для GET-эндпоинтов, см. read_session_factory
+    db = read_session_factory(current_user.id)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_write_db(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Session:
+    # После commit этой сессии чтения пользователя временно идут в основную БД
+    mark_writer(db, current_user.id)
+    return db
+
+async def get_write_db_async(
+    current_user: UserSnapshot = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+) -> AsyncSession:
+    mark_writer(db, current_user.id)
+    return db
+
+async def authenticate_token_async(token: str, db: AsyncSession) -> Tuple[UserSnapshot, dict]:
+    """
+    Проверка токена без HTTPBearer (WebSocket): снимок пользователя и payload токена (нужен exp)
+    """
+    payload = _decode_token(token)
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached, payload
+
+    version = principal_cache.version(payload["sub"])
+    user = await get_user_by_username_async(db, username=payload["sub"])
+    return _remember(token, payload, _check_user(user), version), payload
+
+def _rate_limited(user_dependency, budget: str):
+    """
+    Пользователь из user_dependency с учетом запроса в бюджете budget (по IP и по пользователю)
+    """
+    async def dependency(request: Request, current_user: UserSnapshot = Depends(user_dependency)) -> UserSnapshot:
+        try:
+            await rate_limiter.check(
+                budget,
+                user_id=current_user.id,
+                client_ip=request.client.host if request.client else None
+            )
+        except RateLimitExceeded as exc:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много запросов, попробуйте позже",
+                headers={"Retry-After": retry_after_header(exc)},
+            )
+        return current_user
+
+    return dependency
+
+# Дешевые чтения и дорогая отправка сообщений (Google Books и OpenAI) — разные бюджеты
+get_current_user_read = _rate_limited(get_current_user, "read")
+get_current_user_chat_async = _rate_limited(get_current_user_async, "chat")
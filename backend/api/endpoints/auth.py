@@ -1,30 +1,50 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any
 
-from core.database import get_db
-from core.security import create_access_token, verify_password
+from core.database import get_async_db
+from core.security import create_access_token, verify_and_update_password_async, PasswordHasherBusy
 from config.settings import settings
-from crud.user import get_user_by_username, create_user, get_user_by_email
+from crud.user import (
+    get_user_by_username_async, create_user_async, get_user_by_email_async,
+    update_password_hash_async
+)
 from schemas.user import UserCreate, Token, UserResponse
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Сервер перегружен, попробуйте позже",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    user = get_user_by_username(db, username=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await get_user_by_username_async(db, username=form_data.username)
+    valid = False
+    if user:
+        try:
+            valid, new_hash = await verify_and_update_password_async(form_data.password, user.hashed_password)
+        except PasswordHasherBusy:
+            raise _hasher_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверное имя пользователя или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Прозрачный перехэш, если стоимость bcrypt изменилась в настройках
+    if new_hash:
+        await update_password_hash_async(db, user, new_hash)
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -33,12 +53,12 @@ def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=UserResponse)
-def register_user(
+async def register_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     # Проверка существующего пользователя
-    db_user = get_user_by_username(db, username=user_data.username)
+    db_user = await get_user_by_username_async(db, username=user_data.username)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -46,7 +66,7 @@ def register_user(
         )
     
     # Проверка существующего email
-    db_user = get_user_by_email(db, email=user_data.email)
+    db_user = await get_user_by_email_async(db, email=user_data.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -54,5 +74,8 @@ def register_user(
         )
     
     # Создание пользователя
-    user = create_user(db=db, user=user_data)
+    try:
+        user = await create_user_async(db=db, user=user_data)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     return user
\ No newline at end of file
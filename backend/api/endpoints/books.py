@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from api.dependencies import get_current_user_read, get_read_db
+from crud.catalog import get_catalog_books
+from models.user import User
+from services.similarity_service import find_similar
+
+router = APIRouter(prefix="/books", tags=["books"])
+
+@router.get("/{book_id}/similar")
+def get_similar_books(
+    book_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Книги каталога, близкие по описанию, жанрам и автору
+    """
+    similar = find_similar(book_id, limit)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Книга не найдена в индексе")
+
+    books = get_catalog_books(db, [similar_id for similar_id, _ in similar])
+    return [
+        {**books[similar_id], "score": score}
+        for similar_id, score in similar
+        if similar_id in books
+    ]
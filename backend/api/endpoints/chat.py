@@ -1,57 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import time
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, List, Optional, Set, Tuple
 
-from api.dependencies import get_current_user
-from core.database import get_db
+from api.dependencies import (
+    get_current_user, get_current_user_read, get_current_user_chat_async, authenticate_token_async,
+    get_read_db, get_write_db, get_write_db_async
+)
+from config.settings import settings
+from core.database import AsyncSessionLocal
+from core.http_cache import cache_headers, is_not_modified, make_etag, not_modified
+from core.principal_cache import UserSnapshot
+from core.rate_limit import RateLimitExceeded, rate_limiter, retry_after_header
+from core.replica import mark_writer
+from core.responses import FastJSONResponse
 from crud.chat import (
     get_user_chats, create_chat, update_chat, delete_chat,
-    get_chat, create_message, get_chat_messages
+    get_chat, get_chat_message_rows, get_message_rows_by_chat,
+    get_chats_version, get_chat_version,
+    get_user_chat_summaries, get_chat_cursor,
+    get_chat_async, save_chat_exchange_async
 )
 from schemas.chat import (
     ChatCreate, ChatResponse, MessageCreate, MessageResponse,
-    ChatRequest, ChatResponseData
+    ChatRequest, ChatResponseData, ChatSummaryPage,
+    chat_to_dict, chat_summary_to_dict, message_to_dict
 )
 from models.user import User
-from services.chat_service import process_chat_message
+from services.chat_service import process_chat_message, stream_chat_message
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Эндпоинты чтения истории возвращают FastJSONResponse: данные из БД уже соответствуют
+# response_model, который остается для документации OpenAPI.
+# ETag считается по счетчику версий (users.chats_version, chats.version) до загрузки данных:
+# на совпавший If-None-Match — 304 без тела. Last-Modified не отдается: его точность —
+# секунда, и две записи за одну секунду давали бы ложный 304
+
+def _chat_cache_headers(kind: str, request: Request, user_id: int, chat_id: int, version: int) -> dict:
+    return cache_headers(make_etag(kind, user_id, chat_id, version, str(request.query_params)))
+
 @router.get("/chats", response_model=List[ChatResponse])
 def get_chats(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    limit: int = Query(100, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
 ):
-    chats = get_user_chats(db, current_user.id, skip=skip, limit=limit)
-    return chats
+    version = get_chats_version(db, current_user.id)
+    headers = cache_headers(make_etag("chats", current_user.id, version, str(request.query_params)))
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+
+    try:
+        chats = get_user_chats(db, current_user.id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Неверный курсор")
+    messages = get_message_rows_by_chat(
+        db, [chat.id for chat in chats], per_chat_limit=settings.CHAT_LIST_MESSAGES_PER_CHAT
+    )
+    # Курсор следующей страницы передается в заголовке
+    if chats and len(chats) == limit:
+        headers["X-Next-Cursor"] = get_chat_cursor(chats[-1])
+    return FastJSONResponse(
+        [chat_to_dict(chat, messages[chat.id]) for chat in chats],
+        headers=headers
+    )
+
+@router.get("/chats/summary", response_model=ChatSummaryPage)
+def get_chat_summaries(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    try:
+        items, next_cursor = get_user_chat_summaries(db, current_user.id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Неверный курсор")
+    return FastJSONResponse({
+        "items": [chat_summary_to_dict(item) for item in items],
+        "next_cursor": next_cursor
+    })
 
 @router.post("/chats", response_model=ChatResponse)
 def create_new_chat(
     chat: ChatCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     return create_chat(db, chat, current_user.id)
 
 @router.get("/chats/{chat_id}", response_model=ChatResponse)
 def get_chat_by_id(
+    request: Request,
     chat_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
 ):
+    version = get_chat_version(db, chat_id, current_user.id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Чат не найден")
+    headers = _chat_cache_headers("chat", request, current_user.id, chat_id, version)
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+
     chat = get_chat(db, chat_id, current_user.id)
     if not chat:
         raise HTTPException(status_code=404, detail="Чат не найден")
-    return chat
+    # Только последние сообщения, как в списке чатов: более ранние — через /chats/{id}/messages?before_id=
+    messages = get_message_rows_by_chat(
+        db, [chat.id], per_chat_limit=settings.CHAT_LIST_MESSAGES_PER_CHAT
+    )[chat.id]
+    return FastJSONResponse(chat_to_dict(chat, messages), headers=headers)
 
 @router.put("/chats/{chat_id}", response_model=ChatResponse)
 def update_chat_title(
     chat_id: int,
     title: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     chat = update_chat(db, chat_id, current_user.id, title)
     if not chat:
@@ -62,7 +136,7 @@ def update_chat_title(
 def delete_chat_by_id(
     chat_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     success = delete_chat(db, chat_id, current_user.id)
     if not success:
@@ -71,62 +145,297 @@ def delete_chat_by_id(
 
 @router.get("/chats/{chat_id}/messages", response_model=List[MessageResponse])
 def get_messages(
+    request: Request,
     chat_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
 ):
-    messages = get_chat_messages(db, chat_id=chat_id, user_id=current_user.id)
-    return messages
+    version = get_chat_version(db, chat_id, current_user.id)
+    if version is None:
+        # Чужой или несуществующий чат — пустая история, как и раньше
+        return FastJSONResponse([])
+    headers = _chat_cache_headers("messages", request, current_user.id, chat_id, version)
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+
+    messages = get_chat_message_rows(
+        db,
+        chat_id=chat_id,
+        user_id=current_user.id,
+        before_id=before_id,
+        after_id=after_id,
+        limit=limit
+    )
+    return FastJSONResponse([message_to_dict(message) for message in messages], headers=headers)
+
+async def _check_chat_owner(db: AsyncSession, chat_id: int, user_id: int) -> None:
+    # Проверяем, что чат принадлежит пользователю
+    chat = await get_chat_async(db, chat_id, user_id)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Чат не найден")
 
 @router.post("/", response_model=ChatResponseData)
 async def send_message(
     request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_chat_async),
+    db: AsyncSession = Depends(get_write_db_async)
 ):
-    # Если chat_id не указан, создаем новый чат
-    if not request.chat_id:
-        chat = create_chat(db, ChatCreate(title="Новый чат"), current_user.id)
-        chat_id = chat.id
-    else:
-        chat_id = request.chat_id
-        # Проверяем, что чат принадлежит пользователю
-        chat = get_chat(db, chat_id, current_user.id)
-        if not chat:
-            raise HTTPException(status_code=404, detail="Чат не найден")
-    
-    # Сохраняем сообщение пользователя
-    user_message = create_message(
-        db,
-        MessageCreate(content=request.message, role="user"),
-        chat_id
-    )
+    # Если chat_id не указан, чат будет создан вместе с сообщениями
+    if request.chat_id:
+        await _check_chat_owner(db, request.chat_id, current_user.id)
     
     # Обрабатываем сообщение через сервис
     response_data = await process_chat_message(
         db=db,
         user_message=request.message,
-        chat_id=chat_id,
-        user_id=current_user.id
+        chat_id=request.chat_id,
+        user_id=current_user.id,
+        use_cache=request.use_cache
     )
     
-    # Сохраняем ответ бота
-    bot_message = create_message(
+    # Сообщение пользователя, ответ бота, заголовок и updated_at — одной транзакцией
+    chat_id = await save_chat_exchange_async(
         db,
-        MessageCreate(
-            content=response_data["response"],
-            role="assistant",
-            meta={"recommendations": response_data.get("recommendations")}
-        ),
-        chat_id
+        current_user.id,
+        request.chat_id,
+        [
+            MessageCreate(content=request.message, role="user"),
+            MessageCreate(
+                content=response_data["response"],
+                role="assistant",
+                meta={"recommendations": response_data.get("recommendations")}
+            )
+        ]
     )
     
-    # Обновляем заголовок чата, если это первое сообщение
-    if len(chat.messages) <= 2:  # Только что созданный чат
-        update_chat(db, chat_id, current_user.id, request.message[:50] + "...")
-    
     return ChatResponseData(
         response=response_data["response"],
         recommendations=response_data.get("recommendations"),
         chat_id=chat_id
-    )
\ No newline at end of file
+    )
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _save_streamed_reply(
+    chat_id: int,
+    user_id: int,
+    content: str,
+    recommendations: Optional[list]
+):
+    # Собственная сессия: ответ сохраняется уже после отправки заголовков
+    async with AsyncSessionLocal() as db:
+        mark_writer(db, user_id)
+        await save_chat_exchange_async(
+            db,
+            user_id,
+            chat_id,
+            [
+                MessageCreate(
+                    content=content,
+                    role="assistant",
+                    meta={"recommendations": recommendations}
+                )
+            ]
+        )
+
+@router.post("/stream")
+async def send_message_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user_chat_async),
+    db: AsyncSession = Depends(get_write_db_async)
+):
+    """
+    Потоковый вариант POST /chat/ (Server-Sent Events).
+    События: chat -> recommendations -> token... -> done.
+    Ответ бота сохраняется по завершении потока или при отключении клиента
+    """
+    user_id = current_user.id
+    if request.chat_id:
+        await _check_chat_owner(db, request.chat_id, user_id)
+    
+    # Сохраняем сообщение пользователя (и создаем чат): chat_id нужен клиенту до начала потока
+    chat_id = await save_chat_exchange_async(
+        db,
+        user_id,
+        request.chat_id,
+        [MessageCreate(content=request.message, role="user")]
+    )
+    
+    async def event_stream():
+        parts = []
+        recommendations = None
+        try:
+            yield _sse("chat", {"chat_id": chat_id})
+            # Собственная сессия: сессия зависимости не обязана жить, пока идет поток
+            # (в FastAPI >= 0.106 она закрывается до отправки тела)
+            async with AsyncSessionLocal() as stream_db:
+                mark_writer(stream_db, user_id)
+                async for event, data in stream_chat_message(
+                    db=stream_db,
+                    user_message=request.message,
+                    chat_id=chat_id,
+                    user_id=user_id,
+                    use_cache=request.use_cache
+                ):
+                    if event == "recommendations":
+                        recommendations = data
+                    else:
+                        parts.append(data)
+                    yield _sse(event, data)
+            yield _sse("done", {"chat_id": chat_id})
+        finally:
+            content = "".join(parts)
+            if content or recommendations:
+                # Защита от отмены: клиент мог отключиться
+                with anyio.CancelScope(shield=True):
+                    await _save_streamed_reply(chat_id, user_id, content, recommendations)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+WS_AUTH_TIMEOUT = 10.0
+
+class _WebSocketError(Exception):
+    def __init__(self, code: str, detail: str, **extra: Any):
+        super().__init__(detail)
+        self.frame = {"type": "error", "code": code, "detail": detail, **extra}
+
+async def _ws_authenticate(websocket: WebSocket, token: Optional[str]) -> Optional[Tuple[UserSnapshot, Optional[float]]]:
+    """
+    Токен из параметра ?token= или из первого кадра {"type": "auth", "token": ...}.
+    Возвращает пользователя и exp токена; при ошибке закрывает соединение
+    """
+    if token is None:
+        try:
+            with anyio.fail_after(WS_AUTH_TIMEOUT):
+                frame = json.loads(await websocket.receive_text())
+            token = frame.get("token") if isinstance(frame, dict) and frame.get("type") == "auth" else None
+        except WebSocketDisconnect:
+            return None
+        except (TimeoutError, ValueError):
+            token = None
+    if token:
+        try:
+            async with AsyncSessionLocal() as db:
+                user, payload = await authenticate_token_async(token, db)
+            return user, payload.get("exp")
+        except HTTPException:
+            pass
+    await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Неверный токен")
+    return None
+
+async def _ws_send_message(
+    websocket: WebSocket,
+    user_id: int,
+    request: ChatRequest,
+    owned_chats: Set[int]
+) -> int:
+    """
+    Одно сообщение по WebSocket: те же события, что у POST /chat/stream. Возвращает id чата
+    """
+    async with AsyncSessionLocal() as db:
+        mark_writer(db, user_id)
+        if request.chat_id is not None and request.chat_id not in owned_chats:
+            if not await get_chat_async(db, request.chat_id, user_id):
+                raise _WebSocketError("not_found", "Чат не найден", chat_id=request.chat_id)
+        chat_id = await save_chat_exchange_async(
+            db,
+            user_id,
+            request.chat_id,
+            [MessageCreate(content=request.message, role="user")]
+        )
+        owned_chats.add(chat_id)
+
+        parts = []
+        recommendations = None
+        try:
+            await websocket.send_json({"type": "chat", "data": {"chat_id": chat_id}})
+            async for event, data in stream_chat_message(
+                db=db,
+                user_message=request.message,
+                chat_id=chat_id,
+                user_id=user_id,
+                use_cache=request.use_cache
+            ):
+                if event == "recommendations":
+                    recommendations = data
+                else:
+                    parts.append(data)
+                await websocket.send_json({"type": event, "data": data})
+            await websocket.send_json({"type": "done", "data": {"chat_id": chat_id}})
+        finally:
+            content = "".join(parts)
+            if content or recommendations:
+                with anyio.CancelScope(shield=True):
+                    await _save_streamed_reply(chat_id, user_id, content, recommendations)
+    return chat_id
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Чат по WebSocket: токен и владение чатом проверяются один раз на соединение.
+    Кадры клиента: {"type": "auth", "token"} (если нет ?token=), {"type": "open", "chat_id"},
+    {"type": "message", "message", "chat_id"?, "use_cache"?}.
+    Кадры сервера: {"type": "chat" | "recommendations" | "token" | "done" | "error", ...}.
+    Сообщение без chat_id продолжает открытый чат; {"type": "open", "chat_id": null} начинает новый
+    """
+    await websocket.accept()
+    authenticated = await _ws_authenticate(websocket, token)
+    if authenticated is None:
+        return
+    user, expires_at = authenticated
+    client_ip = websocket.client.host if websocket.client else None
+    owned_chats: Set[int] = set()
+    current_chat: Optional[int] = None
+    await websocket.send_json({"type": "ready", "data": {"user_id": user.id}})
+
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            if expires_at is not None and time.time() >= expires_at:
+                await websocket.send_json({"type": "error", "code": "token_expired", "detail": "Срок действия токена истек"})
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Срок действия токена истек")
+                return
+            try:
+                frame = json.loads(raw)
+                if not isinstance(frame, dict):
+                    raise _WebSocketError("bad_request", "Ожидается JSON-объект")
+                kind = frame.get("type")
+                if kind == "open":
+                    chat_id = frame.get("chat_id")
+                    if chat_id is not None and not isinstance(chat_id, int):
+                        raise _WebSocketError("bad_request", "chat_id должен быть числом")
+                    if chat_id is not None and chat_id not in owned_chats:
+                        async with AsyncSessionLocal() as db:
+                            if not await get_chat_async(db, chat_id, user.id):
+                                raise _WebSocketError("not_found", "Чат не найден", chat_id=chat_id)
+                        owned_chats.add(chat_id)
+                    current_chat = chat_id
+                    await websocket.send_json({"type": "opened", "data": {"chat_id": chat_id}})
+                elif kind == "message":
+                    request = ChatRequest(**{"chat_id": current_chat, **frame})
+                    try:
+                        await rate_limiter.check("chat", user_id=user.id, client_ip=client_ip)
+                    except RateLimitExceeded as exc:
+                        raise _WebSocketError(
+                            "rate_limited", "Слишком много запросов, попробуйте позже",
+                            retry_after=int(retry_after_header(exc))
+                        )
+                    current_chat = await _ws_send_message(websocket, user.id, request, owned_chats)
+                else:
+                    raise _WebSocketError("bad_request", "Неизвестный тип кадра")
+            except ValueError as exc:
+                # ValidationError pydantic — тоже ValueError
+                detail = "Неверные данные сообщения" if isinstance(exc, ValidationError) else "Неверный JSON"
+                await websocket.send_json({"type": "error", "code": "bad_request", "detail": detail})
+            except _WebSocketError as exc:
+                await websocket.send_json(exc.frame)
+    except WebSocketDisconnect:
+        pass
@@ -1,25 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Iterator, List
 
-from api.dependencies import get_current_user
-from core.database import get_db
+import orjson
+
+from api.dependencies import (
+    get_current_user, get_current_user_read, get_read_db, get_write_db, read_session_factory
+)
+from core.http_cache import cache_headers, is_not_modified, make_etag, not_modified
 from crud.user import get_user, update_user
-from crud.chat import get_favorite_books, add_favorite_book, remove_favorite_book
-from schemas.user import UserResponse, UserUpdate
+from crud.chat import (
+    get_favorite_books, get_favorites_version, add_favorite_book, remove_favorite_book,
+    upsert_favorite_books, iter_favorite_book_batches
+)
+from schemas.user import (
+    UserResponse, UserUpdate, BookRecommendation, FavoritesBulkRequest, FavoritesBulkResult
+)
+from services.recommendation_service import get_user_recommendations
 from models.user import User
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+# Поля экспорта совпадают с полями импорта (POST /favorites/bulk)
+EXPORT_FIELDS = ("id", "title", "author", "cover_url", "added_at")
+
 @router.get("/me", response_model=UserResponse)
-def read_current_user(current_user: User = Depends(get_current_user)):
+def read_current_user(current_user: User = Depends(get_current_user_read)):
     return current_user
 
 @router.put("/me", response_model=UserResponse)
 def update_current_user(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     user = update_user(db, current_user.id, user_update)
     if not user:
@@ -28,27 +44,108 @@ def update_current_user(
 
 @router.get("/favorites")
 def get_user_favorites(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
 ):
+    # ETag по счетчику версий избранного: на совпадение — 304 без загрузки книг
+    headers = cache_headers(make_etag("favorites", current_user.id, get_favorites_version(db, current_user.id)))
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    response.headers.update(headers)
     return get_favorite_books(db, current_user.id)
 
 @router.post("/favorites")
 def add_to_favorites(
     book_data: dict,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
 
     return add_favorite_book(db, current_user.id, book_data)
 
+@router.post("/favorites/bulk", response_model=FavoritesBulkResult)
+def bulk_add_to_favorites(
+    payload: FavoritesBulkRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_write_db)
+):
+    """
+    Импорт избранного пачкой: уже добавленные книги обновляются, дубли не создаются
+    """
+    books = [book.model_dump() for book in payload.books]
+    return upsert_favorite_books(db, current_user.id, books)
+
+def _export_batches(session_factory, user_id: int) -> Iterator[List[dict]]:
+    # Своя сессия: генератор дочитывает строки уже после выхода из эндпоинта
+    with session_factory() as db:
+        for batch in iter_favorite_book_batches(db, user_id):
+            yield [
+                {
+                    "id": row.book_id,
+                    "title": row.title,
+                    "author": row.author,
+                    "cover_url": row.cover_url,
+                    "added_at": row.added_at.isoformat() if row.added_at else None
+                }
+                for row in batch
+            ]
+
+# Кусок ответа — порция строк, а не одна книга: меньше переходов в пул потоков
+def _ndjson_chunks(batches: Iterator[List[dict]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(orjson.dumps(row) + b"\n" for row in batch)
+
+def _csv_chunks(batches: Iterator[List[dict]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@router.get("/favorites/export")
+def export_favorites(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user_read)
+):
+    """
+    Потоковый экспорт избранного: NDJSON (по книге в строке) или CSV
+    """
+    batches = _export_batches(read_session_factory(current_user.id), current_user.id)
+    if format == "csv":
+        body, media_type = _csv_chunks(batches), "text/csv; charset=utf-8"
+    else:
+        body, media_type = _ndjson_chunks(batches), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="favorites.{format}"'}
+    )
+
 @router.delete("/favorites/{book_id}")
 def remove_from_favorites(
     book_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     success = remove_favorite_book(db, current_user.id, book_id)
     if not success:
         raise HTTPException(status_code=404, detail="Книга не найдена в избранном")
-    return {"message": "Книга удалена из избранного"}
\ No newline at end of file
+    return {"message": "Книга удалена из избранного"}
+
+@router.get("/recommendations", response_model=List[BookRecommendation])
+def get_recommendations(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Книги, которые часто добавляют в избранное вместе с книгами пользователя
+    """
+    return get_user_recommendations(db, current_user.id, limit)
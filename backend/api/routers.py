@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from api.endpoints import auth, users, chat
+from api.endpoints import auth, users, chat, books
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router)
 api_router.include_router(users.router)
-api_router.include_router(chat.router)
\ No newline at end of file
+api_router.include_router(chat.router)
+api_router.include_router(books.router)
\ No newline at end of file
@@ -1,18 +1,53 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from core.database import engine, Base
+from core.database import engine, async_engine, replica_engine, Base
+from core.compression import CompressionMiddleware
+from core.http_client import init_http_clients, close_http_clients
+from core.metrics import MetricsMiddleware, instrument_engine, render_metrics
+from core.migrations import upgrade_schema
+from core.profiling import ProfilingMiddleware, is_profiling_token, profile_store
+from core.principal_cache import principal_cache
+from core.rate_limit import rate_limiter
+from core.replica import write_tracker
+from core.resilience import get_upstream_stats
+from core.security import shutdown_hash_executor
 from config.settings import settings
 from api.routers import api_router
+from services.book_service import close_caches, get_cache_stats
+from services.chat_service import close_llm_cache, get_llm_cache_stats
+from services.recommendation_service import recommendation_engine
+from services.similarity_service import similarity_index
+
+# Счетчики SQL для /metrics
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+if replica_engine is not None:
+    instrument_engine(replica_engine, "replica")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Создание таблиц при запуске
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
     print("База данных инициализирована")
+    await init_http_clients()
+    recommendation_engine.start()
+    similarity_index.start()
     yield
     # Очистка при завершении
+    await recommendation_engine.stop()
+    await similarity_index.stop()
+    await close_http_clients()
+    await close_caches()
+    await close_llm_cache()
+    await rate_limiter.close()
+    await write_tracker.close()
+    await async_engine.dispose()
+    shutdown_hash_executor()
     print("Приложение завершает работу")
 
 app = FastAPI(
@@ -29,8 +64,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # Курсор пагинации и ETag читаются браузерным клиентом
+)
+
+# Сжатие больших ответов (история чатов, избранное); SSE не сжимается
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_COMPRESSION_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY
 )
 
+# Профилировщик внутри MetricsMiddleware: берет из него счетчики SQL и внешних вызовов
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # Подключение роутеров
 app.include_router(api_router, prefix="/api/v1")
 
@@ -46,6 +94,46 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "book-chat-bot"}
 
+@app.get("/health/cache")
+async def cache_stats():
+    return {
+        "books": get_cache_stats(),
+        "principals": principal_cache.stats(),
+        "llm": get_llm_cache_stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def _check_profiling_token(token: Optional[str]) -> None:
+    if not is_profiling_token(token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/debug/profiles")
+async def list_profiles(x_profile: Optional[str] = Header(None)):
+    _check_profiling_token(x_profile)
+    return profile_store.list()
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(profile_id: int, x_profile: Optional[str] = Header(None)):
+    """
+    Профиль в формате speedscope (https://www.speedscope.app)
+    """
+    _check_profiling_token(x_profile)
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    return {**profile.to_speedscope(), "breakdown": profile.breakdown}
+
+@app.get("/health/upstreams")
+async def upstream_stats():
+    return get_upstream_stats()
+
+@app.get("/health/rate-limits")
+async def rate_limit_stats():
+    return rate_limiter.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,66 @@
+"""
+Сравнение двух отчетов benchmarks.run:
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+
+Код возврата 1, если p95 какого-либо эндпоинта вырос больше чем на threshold процентов
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+def _delta(base: float, head: float) -> Optional[float]:
+    if not base:
+        return None
+    return (head - base) / base * 100
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Печатает таблицу изменений и возвращает список регрессий
+    """
+    regressions = []
+    for scenario, head_result in head["scenarios"].items():
+        base_result = base["scenarios"].get(scenario)
+        if base_result is None:
+            continue
+        print(f"\n{scenario}")
+        for label, head_stats in head_result["endpoints"].items():
+            base_stats = base_result["endpoints"].get(label)
+            if base_stats is None:
+                continue
+            cells = []
+            for metric in METRICS:
+                delta = _delta(base_stats[metric], head_stats[metric])
+                change = f"{delta:+.1f}%" if delta is not None else "n/a"
+                cells.append(f"{metric}={head_stats[metric]} ({change})")
+            print(f"  {label}: " + ", ".join(cells))
+
+            delta = _delta(base_stats["p95_ms"], head_stats["p95_ms"])
+            if delta is not None and delta > threshold:
+                regressions.append(f"{scenario} {label}: p95 {base_stats['p95_ms']} -> {head_stats['p95_ms']} ms")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение отчетов бенчмарка")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Допустимый рост p95, %%")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+
+    regressions = compare(base, head, args.threshold)
+    if regressions:
+        print("\nРегрессии:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
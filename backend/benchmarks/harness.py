@@ -0,0 +1,109 @@
+"""
+Замер задержек и пропускной способности: запись длительностей запросов по эндпоинтам и расчет перцентилей
+"""
+import asyncio
+import math
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+import httpx
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Перцентиль по методу ближайшего ранга; sorted_values должен быть отсортирован
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class Recorder:
+    """
+    Собирает длительности запросов по меткам вида "GET /chat/chats/{chat_id}/messages".
+    Ошибкой считается сбой транспорта или статус 5xx
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+        # Отсчет от первого замеренного запроса: подготовка данных в длительность не входит
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        label: str,
+        method: str,
+        url: str,
+        **kwargs: Any
+    ) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        if self.started_at is None:
+            self.started_at = started
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.durations[label].append(time.perf_counter() - started)
+            self.statuses[label]["transport_error"] += 1
+            self.errors[label] += 1
+            return None
+        self.durations[label].append(time.perf_counter() - started)
+        self.statuses[label][str(response.status_code)] += 1
+        if response.status_code >= 500:
+            self.errors[label] += 1
+        return response
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        started_at = self.started_at if self.started_at is not None else time.perf_counter()
+        duration = (self.finished_at or time.perf_counter()) - started_at
+        endpoints = {}
+        for label, values in sorted(self.durations.items()):
+            values = sorted(values)
+            endpoints[label] = {
+                "count": len(values),
+                "errors": self.errors[label],
+                "statuses": dict(self.statuses[label]),
+                "throughput_rps": round(len(values) / duration, 2) if duration else 0.0,
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3)
+            }
+        total = sum(len(values) for values in self.durations.values())
+        return {
+            "duration_s": round(duration, 3),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / duration, 2) if duration else 0.0,
+            "endpoints": endpoints
+        }
+
+@dataclass
+class BenchContext:
+    client: httpx.AsyncClient
+    concurrency: int = 20
+    users: int = 50
+    messages: int = 5
+    chats: int = 20
+    history: int = 200
+    iterations: int = 200
+    recorder: Recorder = field(default_factory=Recorder)
+
+async def run_concurrently(items: Iterable[Any], worker: Callable[[Any], Awaitable[Any]], concurrency: int) -> List[Any]:
+    """
+    Выполняет worker для каждого элемента, не более concurrency одновременно
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item: Any) -> Any:
+        async with semaphore:
+            return await worker(item)
+
+    return await asyncio.gather(*(run(item) for item in items))
@@ -0,0 +1,209 @@
+"""
+Запуск бенчмарков API.
+
+    python -m benchmarks.run --target asgi --output bench.json
+    python -m benchmarks.run --target uvicorn --workers 2 --scenarios chat_send_storm
+
+Google Books и OpenAI заменяются заглушками (benchmarks.stubs), БД — временный SQLite-файл.
+Результат — JSON с пропускной способностью и p50/p95/p99 по эндпоинтам; сравнение — benchmarks.compare
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+import httpx
+from benchmarks.harness import BenchContext
+from benchmarks.scenarios import SCENARIOS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_environment(workdir: str, args: argparse.Namespace) -> Dict[str, str]:
+    """
+    Переменные окружения приложения под бенчмарком: временная БД, без Redis и лимитов, ключи для заглушек
+    """
+    env = {
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "SECRET_KEY": "bench-secret",
+        "REDIS_URL": "",
+        "GOOGLE_BOOKS_API_KEY": "stub",
+        "OPENAI_API_KEY": "stub",
+        "SIMILARITY_INDEX_DIR": os.path.join(workdir, "similarity_index"),
+        # Все запросы идут с одного IP: лимиты исказили бы замер
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    if args.bcrypt_rounds:
+        env["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    return env
+
+async def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Сервер не поднялся: {url}")
+            await asyncio.sleep(0.2)
+
+@asynccontextmanager
+async def asgi_target(args: argparse.Namespace, env: Dict[str, str]) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Приложение в том же процессе через httpx.ASGITransport; внешние API — заглушка через ASGITransport
+    """
+    os.environ.update(env)
+    from app import app
+    from core.http_client import init_http_clients
+    from benchmarks.stubs import create_stub_app
+
+    stub = create_stub_app(args.stub_latency_ms, args.stub_error_rate, seed=args.seed)
+    async with app.router.lifespan_context(app):
+        await init_http_clients(transport=httpx.ASGITransport(app=stub))
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            timeout=args.timeout
+        ) as client:
+            yield client
+
+@asynccontextmanager
+async def uvicorn_target(args: argparse.Namespace, env: Dict[str, str]) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Настоящий uvicorn в отдельном процессе; заглушка внешних API — еще один процесс
+    """
+    stub_port, app_port = _free_port(), _free_port()
+    env = dict(
+        env,
+        GOOGLE_BOOKS_BASE_URL=f"http://127.0.0.1:{stub_port}/books/v1",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{stub_port}/v1",
+    )
+    # Подготовка данных (история чатов) пишет в ту же БД из процесса бенчмарка
+    os.environ.update(env)
+    processes: List[subprocess.Popen] = []
+    try:
+        processes.append(subprocess.Popen(
+            [
+                sys.executable, "-m", "benchmarks.stubs",
+                "--port", str(stub_port),
+                "--latency-ms", str(args.stub_latency_ms),
+                "--error-rate", str(args.stub_error_rate),
+            ],
+            cwd=BACKEND_DIR, env={**os.environ, **env}
+        ))
+        processes.append(subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app:app",
+                "--host", "127.0.0.1", "--port", str(app_port),
+                "--workers", str(args.workers), "--log-level", "warning",
+            ],
+            cwd=BACKEND_DIR, env={**os.environ, **env}
+        ))
+        await _wait_ready(f"http://127.0.0.1:{stub_port}/docs")
+        await _wait_ready(f"http://127.0.0.1:{app_port}/health")
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{app_port}",
+            timeout=args.timeout,
+            limits=httpx.Limits(max_connections=args.concurrency * 2)
+        ) as client:
+            yield client
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="book-chat-bench-")
+    env = bench_environment(workdir, args)
+    target = asgi_target if args.target == "asgi" else uvicorn_target
+
+    results: Dict[str, Any] = {}
+    async with target(args, env) as client:
+        for name in args.scenarios:
+            ctx = BenchContext(
+                client=client,
+                concurrency=args.concurrency,
+                users=args.users,
+                messages=args.messages,
+                chats=args.chats,
+                history=args.history,
+                iterations=args.iterations
+            )
+            await SCENARIOS[name](ctx)
+            ctx.recorder.finish()
+            results[name] = ctx.recorder.report()
+            print(f"{name}: {results[name]['requests']} запросов, {results[name]['throughput_rps']} rps", file=sys.stderr)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "target": args.target,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                key: value for key, value in vars(args).items()
+                if key not in ("output", "scenarios")
+            }
+        },
+        "scenarios": results
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк API книжного чат-бота")
+    parser.add_argument("--target", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50, help="Пользователей в сценариях с несколькими пользователями")
+    parser.add_argument("--messages", type=int, default=6, help="Сообщений/операций на пользователя")
+    parser.add_argument("--chats", type=int, default=20, help="Чатов с большой историей")
+    parser.add_argument("--history", type=int, default=200, help="Сообщений в каждом таком чате")
+    parser.add_argument("--iterations", type=int, default=400, help="Запросов чтения в chat_list_large_history")
+    parser.add_argument("--workers", type=int, default=1, help="Процессов uvicorn (только --target uvicorn)")
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="Переопределить BCRYPT_ROUNDS")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Файл для JSON-отчета (по умолчанию stdout)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmarks(args))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Сценарии нагрузки. Каждый сценарий — async-функция от BenchContext; подготовка данных в замер не входит
+"""
+import asyncio
+import itertools
+import random
+import uuid
+from typing import Awaitable, Callable, Dict, List, Tuple
+import httpx
+from benchmarks.harness import BenchContext, Recorder, run_concurrently
+
+API = "/api/v1"
+PASSWORD = "bench-password"
+
+BOOK_MESSAGES = [
+    "Посоветуй книгу про космос",
+    "Какие книги почитать о войне?",
+    "Рекомендуй автора детективов",
+]
+
+def _auth(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+async def _register(client: httpx.AsyncClient, recorder: Recorder, username: str) -> int:
+    response = await recorder.request(
+        client, "POST /auth/register", "POST", f"{API}/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": PASSWORD}
+    )
+    return response.json()["id"] if response is not None and response.status_code == 200 else 0
+
+async def _login(client: httpx.AsyncClient, recorder: Recorder, username: str) -> str:
+    response = await recorder.request(
+        client, "POST /auth/token", "POST", f"{API}/auth/token",
+        data={"username": username, "password": PASSWORD}
+    )
+    return response.json()["access_token"] if response is not None and response.status_code == 200 else ""
+
+async def create_users(ctx: BenchContext, count: int) -> List[Tuple[int, str]]:
+    """
+    Подготовка: регистрирует и логинит пользователей без записи в отчет сценария
+    """
+    setup = Recorder()
+    prefix = uuid.uuid4().hex[:8]
+
+    async def create(i: int) -> Tuple[int, str]:
+        username = f"bench_{prefix}_{i}"
+        user_id = await _register(ctx.client, setup, username)
+        return user_id, await _login(ctx.client, setup, username)
+
+    users = await run_concurrently(range(count), create, ctx.concurrency)
+    return [user for user in users if user[1]]
+
+async def auth_burst(ctx: BenchContext) -> None:
+    """
+    Всплеск регистраций и входов: упирается в bcrypt и пул хэширования паролей
+    """
+    prefix = uuid.uuid4().hex[:8]
+
+    async def user_flow(i: int) -> None:
+        username = f"burst_{prefix}_{i}"
+        await _register(ctx.client, ctx.recorder, username)
+        await _login(ctx.client, ctx.recorder, username)
+
+    await run_concurrently(range(ctx.users), user_flow, ctx.concurrency)
+
+async def chat_send_storm(ctx: BenchContext) -> None:
+    """
+    Пользователи параллельно отправляют сообщения: поиск книг и ответы OpenAI (через заглушки)
+    """
+    users = await create_users(ctx, ctx.users)
+
+    async def conversation(user: Tuple[int, str]) -> None:
+        _, token = user
+        chat_id = None
+        for i in range(ctx.messages):
+            if i % 2 == 0:
+                message = random.choice(BOOK_MESSAGES)
+            else:
+                message = f"Привет! Что ты думаешь о чтении перед сном? #{uuid.uuid4().hex[:6]}"
+            response = await ctx.recorder.request(
+                ctx.client, "POST /chat/", "POST", f"{API}/chat/",
+                json={"message": message, "chat_id": chat_id},
+                headers=_auth(token)
+            )
+            if response is not None and response.status_code == 200:
+                chat_id = response.json()["chat_id"]
+
+    await run_concurrently(users, conversation, ctx.concurrency)
+
+def _seed_history(user_id: int, chats: int, history: int) -> List[int]:
+    # Прямая запись в БД: набирать историю через API слишком долго
+    from core.database import SessionLocal
+    from models.chat import Chat, Message
+
+    db = SessionLocal()
+    try:
+        chat_ids = []
+        for c in range(chats):
+            chat = Chat(user_id=user_id, title=f"Чат {c}", message_count=history)
+            db.add(chat)
+            db.flush()
+            db.add_all([
+                Message(
+                    chat_id=chat.id,
+                    role="user" if m % 2 == 0 else "assistant",
+                    content=f"Сообщение {m} в чате {c}: " + "текст " * 20
+                )
+                for m in range(history)
+            ])
+            chat_ids.append(chat.id)
+        db.commit()
+        return chat_ids
+    finally:
+        db.close()
+
+async def chat_list_large_history(ctx: BenchContext) -> None:
+    """
+    Чтение списка чатов, сводки и страниц истории у пользователя с большой историей
+    """
+    (user_id, token), = await create_users(ctx, 1)
+    chat_ids = await asyncio.to_thread(_seed_history, user_id, ctx.chats, ctx.history)
+    headers = _auth(token)
+
+    async def read(i: int) -> None:
+        kind = i % 4
+        if kind == 0:
+            await ctx.recorder.request(
+                ctx.client, "GET /chat/chats", "GET", f"{API}/chat/chats",
+                params={"limit": 50}, headers=headers
+            )
+        elif kind == 1:
+            await ctx.recorder.request(
+                ctx.client, "GET /chat/chats/summary", "GET", f"{API}/chat/chats/summary",
+                params={"limit": 50}, headers=headers
+            )
+        else:
+            chat_id = random.choice(chat_ids)
+            response = await ctx.recorder.request(
+                ctx.client, "GET /chat/chats/{chat_id}/messages", "GET",
+                f"{API}/chat/chats/{chat_id}/messages", params={"limit": 50}, headers=headers
+            )
+            if kind == 3 and response is not None and response.status_code == 200 and response.json():
+                await ctx.recorder.request(
+                    ctx.client, "GET /chat/chats/{chat_id}/messages?before_id", "GET",
+                    f"{API}/chat/chats/{chat_id}/messages",
+                    params={"limit": 50, "before_id": response.json()[0]["id"]}, headers=headers
+                )
+
+    await run_concurrently(range(ctx.iterations), read, ctx.concurrency)
+
+async def favorites_churn(ctx: BenchContext) -> None:
+    """
+    Добавление, чтение и удаление избранного вперемешку с запросом рекомендаций
+    """
+    users = await create_users(ctx, ctx.users)
+    steps = itertools.count()
+
+    async def churn(user: Tuple[int, str]) -> None:
+        _, token = user
+        headers = _auth(token)
+        for _ in range(ctx.messages):
+            book_id = f"fav-{random.randrange(200)}"
+            await ctx.recorder.request(
+                ctx.client, "POST /users/favorites", "POST", f"{API}/users/favorites",
+                json={"id": book_id, "title": f"Книга {book_id}", "author": "Автор"},
+                headers=headers
+            )
+            await ctx.recorder.request(
+                ctx.client, "GET /users/favorites", "GET", f"{API}/users/favorites", headers=headers
+            )
+            if next(steps) % 3 == 0:
+                await ctx.recorder.request(
+                    ctx.client, "GET /users/recommendations", "GET", f"{API}/users/recommendations",
+                    headers=headers
+                )
+            await ctx.recorder.request(
+                ctx.client, "DELETE /users/favorites/{book_id}", "DELETE",
+                f"{API}/users/favorites/{book_id}", headers=headers
+            )
+
+    await run_concurrently(users, churn, ctx.concurrency)
+
+SCENARIOS: Dict[str, Callable[[BenchContext], Awaitable[None]]] = {
+    "auth_burst": auth_burst,
+    "chat_send_storm": chat_send_storm,
+    "chat_list_large_history": chat_list_large_history,
+    "favorites_churn": favorites_churn,
+}
@@ -0,0 +1,151 @@
+"""
+Сериализация истории чата: стандартный путь FastAPI против быстрого.
+
+    python -m benchmarks.serialization --history 100 1000 10000 --repeat 20
+
+Стандартный путь — ORM-объекты, валидация по response_model (serialize_response) и json.dumps в
+JSONResponse. Быстрый — строки MESSAGE_COLUMNS, dict без pydantic и FastJSONResponse (orjson).
+Замеряется GET /chat/chats/{chat_id} без HTTP: загрузка из БД и рендер тела ответа.
+БД — временный SQLite-файл; перед замером проверяется, что оба пути дают одинаковый JSON
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+def _seed_chat(history: int) -> int:
+    from core.database import SessionLocal
+    from models.chat import Chat, Message
+    from models.user import User
+
+    db = SessionLocal()
+    try:
+        user = User(username=f"serialization_{history}", email=f"serialization_{history}@example.com", hashed_password="-")
+        db.add(user)
+        db.flush()
+        chat = Chat(user_id=user.id, title=f"История из {history} сообщений", message_count=history)
+        db.add(chat)
+        db.flush()
+        db.add_all([
+            Message(
+                chat_id=chat.id,
+                role="user" if m % 2 == 0 else "assistant",
+                content=f"Сообщение {m}: " + "текст " * 40,
+                # Ответы бота хранят рекомендации в meta, как в POST /chat/
+                meta=None if m % 2 == 0 else {"recommendations": [
+                    {"id": f"book-{m}-{i}", "title": f"Книга {i}", "authors": ["Автор"], "rating": 4.5}
+                    for i in range(3)
+                ]}
+            )
+            for m in range(history)
+        ])
+        db.commit()
+        return chat.id
+    finally:
+        db.close()
+
+def _standard_path(chat_id: int) -> bytes:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from core.database import SessionLocal
+    from models.chat import Chat
+    from schemas.chat import ChatResponse
+
+    field = create_response_field(name="response", type_=ChatResponse)
+    db = SessionLocal()
+    try:
+        chat = db.get(Chat, chat_id)
+        chat.messages  # ленивая загрузка, как при валидации response_model
+        content = asyncio.run(serialize_response(field=field, response_content=chat))
+        return JSONResponse(content).body
+    finally:
+        db.close()
+
+def _fast_path(chat_id: int) -> bytes:
+    from core.database import SessionLocal
+    from core.responses import FastJSONResponse
+    from crud.chat import get_message_rows_by_chat
+    from models.chat import Chat
+    from schemas.chat import chat_to_dict
+
+    db = SessionLocal()
+    try:
+        chat = db.get(Chat, chat_id)
+        messages = get_message_rows_by_chat(db, [chat_id])[chat_id]
+        return FastJSONResponse(chat_to_dict(chat, messages)).body
+    finally:
+        db.close()
+
+def _measure(path: Callable[[int], bytes], chat_id: int, repeat: int) -> Dict[str, Any]:
+    path(chat_id)  # прогрев
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = path(chat_id)
+        durations.append(time.perf_counter() - started)
+    return {
+        "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "min_ms": round(min(durations) * 1000, 3),
+        "body_bytes": len(body)
+    }
+
+def run(histories: List[int], repeat: int) -> Dict[str, Any]:
+    from core.database import Base, engine
+    import models  # noqa: F401  регистрация таблиц
+
+    Base.metadata.create_all(bind=engine)
+    results = {}
+    for history in histories:
+        chat_id = _seed_chat(history)
+        if json.loads(_standard_path(chat_id)) != json.loads(_fast_path(chat_id)):
+            raise RuntimeError(f"Ответы стандартного и быстрого пути различаются (history={history})")
+        standard = _measure(_standard_path, chat_id, repeat)
+        fast = _measure(_fast_path, chat_id, repeat)
+        results[str(history)] = {
+            "standard": standard,
+            "fast": fast,
+            "speedup": round(standard["median_ms"] / fast["median_ms"], 2) if fast["median_ms"] else None
+        }
+        print(
+            f"history={history}: {standard['median_ms']} мс -> {fast['median_ms']} мс "
+            f"(x{results[str(history)]['speedup']})",
+            file=sys.stderr
+        )
+    return results
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк сериализации истории чата")
+    parser.add_argument("--history", type=int, nargs="+", default=[100, 1000, 10000], help="Сообщений в чате")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Файл для JSON-отчета (по умолчанию stdout)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="book-chat-serialization-")
+    # Настройки читаются при импорте core.database: окружение задается до первого импорта
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "SECRET_KEY": "bench-secret",
+        "REDIS_URL": "",
+    })
+    report = {
+        "config": {"history": args.history, "repeat": args.repeat},
+        "results": run(args.history, args.repeat)
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Заглушки Google Books и OpenAI с настраиваемой задержкой и долей ошибок.
+Пути совпадают с настоящими API относительно хоста: /books/v1/... и /v1/...
+"""
+import asyncio
+import json
+import random
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STUB_REPLY = "Это ответ заглушки OpenAI: советую начать с классики и заглянуть в современную прозу."
+
+def _volume(book_id: str, query: str) -> dict:
+    return {
+        "id": book_id,
+        "volumeInfo": {
+            "title": f"Книга {book_id} ({query})",
+            "authors": [f"Автор {int(book_id.split('-')[-1]) % 50}"],
+            "description": f"Описание книги {book_id} по запросу {query}",
+            "categories": ["Художественная литература"],
+            "averageRating": 4.0,
+            "pageCount": 320,
+            "imageLinks": {"thumbnail": f"https://example.com/{book_id}.jpg"},
+            "previewLink": f"https://example.com/{book_id}"
+        }
+    }
+
+def create_stub_app(latency_ms: float = 50.0, error_rate: float = 0.0, seed: Optional[int] = None) -> FastAPI:
+    app = FastAPI(title="Upstream stubs")
+    rng = random.Random(seed)
+    app.state.requests = 0
+
+    async def delay_or_fail() -> Optional[JSONResponse]:
+        app.state.requests += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse({"error": "stub failure"}, status_code=503)
+        return None
+
+    @app.get("/books/v1/volumes")
+    async def volumes(q: str = "", maxResults: int = 10):
+        error = await delay_or_fail()
+        if error:
+            return error
+        base = abs(hash(q)) % 1000
+        return {"items": [_volume(f"stub-{base + i}", q) for i in range(maxResults)]}
+
+    @app.get("/books/v1/volumes/{book_id}")
+    async def volume(book_id: str):
+        error = await delay_or_fail()
+        if error:
+            return error
+        return _volume(book_id, "details")
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        error = await delay_or_fail()
+        if error:
+            return error
+        body = await request.json()
+        if not body.get("stream"):
+            return {"choices": [{"message": {"role": "assistant", "content": STUB_REPLY}}]}
+
+        async def events():
+            for word in STUB_REPLY.split(" "):
+                chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Сервер-заглушка внешних API для бенчмарков")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_stub_app(args.latency_ms, args.error_rate),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
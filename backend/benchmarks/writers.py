@@ -0,0 +1,163 @@
+"""
+Конкурентная запись в SQLite: профили движка default и tuned (core.database).
+
+    python -m benchmarks.writers --processes 4 --writes 200 --readers 2
+
+Каждый процесс-писатель повторяет запись POST /chat/ (сообщение + UPDATE чата в одной транзакции),
+процессы-читатели параллельно читают страницы истории — как несколько воркеров uvicorn на одном файле БД.
+Для каждого профиля — отдельный временный файл; в отчете пропускная способность, p50/p95/p99 и
+число ошибок "database is locked"
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+from benchmarks.harness import percentile
+
+PROFILES = ("default", "tuned")
+
+def _configure(db_path: str, profile: str) -> None:
+    # Настройки читаются при импорте core.database: в новом процессе окружение задается до импорта
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "DATABASE_PROFILE": profile,
+        "SECRET_KEY": "bench-secret",
+        "REDIS_URL": "",
+    })
+
+def _setup(db_path: str, profile: str, chats: int) -> List[int]:
+    _configure(db_path, profile)
+    from core.database import Base, SessionLocal, engine
+    from models.chat import Chat
+    from models.user import User
+    import models  # noqa: F401  регистрация таблиц
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(username="writer", email="writer@example.com", hashed_password="-")
+        db.add(user)
+        db.flush()
+        chat_list = [Chat(user_id=user.id, title=f"Чат {i}") for i in range(chats)]
+        db.add_all(chat_list)
+        db.commit()
+        return [chat.id for chat in chat_list]
+    finally:
+        db.close()
+
+def _writer(db_path: str, profile: str, chat_id: int, writes: int, start_at: float) -> Dict[str, Any]:
+    _configure(db_path, profile)
+    from sqlalchemy.exc import OperationalError
+    from core.database import SessionLocal
+    from crud.chat import create_message
+    from schemas.chat import MessageCreate
+
+    durations, errors = [], 0
+    time.sleep(max(0.0, start_at - time.time()))
+    for i in range(writes):
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            create_message(db, MessageCreate(content=f"Сообщение {i}: " + "текст " * 20, role="user"), chat_id)
+        except OperationalError:
+            db.rollback()
+            errors += 1
+        finally:
+            db.close()
+        durations.append(time.perf_counter() - started)
+    return {"durations": durations, "errors": errors, "finished_at": time.time()}
+
+def _reader(db_path: str, profile: str, chat_ids: List[int], reads: int, start_at: float) -> Dict[str, Any]:
+    _configure(db_path, profile)
+    from sqlalchemy.exc import OperationalError
+    from core.database import SessionLocal
+    from crud.chat import get_chat_message_rows
+
+    durations, errors = [], 0
+    time.sleep(max(0.0, start_at - time.time()))
+    for i in range(reads):
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            get_chat_message_rows(db, chat_ids[i % len(chat_ids)], user_id=1, limit=50)
+        except OperationalError:
+            errors += 1
+        finally:
+            db.close()
+        durations.append(time.perf_counter() - started)
+    return {"durations": durations, "errors": errors, "finished_at": time.time()}
+
+def _summary(results: List[Dict[str, Any]], start_at: float) -> Dict[str, Any]:
+    elapsed = max(r["finished_at"] for r in results) - start_at
+    values = sorted(d for r in results for d in r["durations"])
+    errors = sum(r["errors"] for r in results)
+    return {
+        "operations": len(values),
+        "errors": errors,
+        "throughput_ops": round((len(values) - errors) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0
+    }
+
+def run_profile(profile: str, args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix=f"book-chat-writers-{profile}-")
+    db_path = os.path.join(workdir, "bench.db")
+    # spawn: каждый процесс заново импортирует core.database со своим окружением, как воркер uvicorn
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.processes + args.readers) as pool:
+        chat_ids = pool.apply(_setup, (db_path, profile, args.processes))
+        start_at = time.time() + 2.0  # время на импорт в процессах пула
+        writers = [
+            pool.apply_async(_writer, (db_path, profile, chat_ids[i], args.writes, start_at))
+            for i in range(args.processes)
+        ]
+        readers = [
+            pool.apply_async(_reader, (db_path, profile, chat_ids, args.reads, start_at))
+            for _ in range(args.readers)
+        ]
+        write_results = [w.get() for w in writers]
+        read_results = [r.get() for r in readers]
+    return {
+        "writes": _summary(write_results, start_at),
+        "reads": _summary(read_results, start_at) if read_results else None
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк конкурентной записи в SQLite")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    parser.add_argument("--processes", type=int, default=4, help="Процессов-писателей")
+    parser.add_argument("--writes", type=int, default=200, help="Записей на процесс")
+    parser.add_argument("--readers", type=int, default=2, help="Процессов-читателей")
+    parser.add_argument("--reads", type=int, default=1000, help="Чтений на процесс")
+    parser.add_argument("--output", help="Файл для JSON-отчета (по умолчанию stdout)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = {}
+    for profile in args.profiles:
+        results[profile] = run_profile(profile, args)
+        writes = results[profile]["writes"]
+        print(
+            f"{profile}: {writes['throughput_ops']} записей/с, p95 {writes['p95_ms']} мс, ошибок {writes['errors']}",
+            file=sys.stderr
+        )
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
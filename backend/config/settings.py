@@ -11,9 +11,38 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Хэширование паролей (bcrypt)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    
+    # Кэш проверенных токенов (get_current_user). Кэш свой у каждого воркера: смена пароля
+    # или деактивация в других воркерах применяется не позже чем через PRINCIPAL_CACHE_TTL секунд
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60.0
+    
     # Настройки базы данных
     DATABASE_URL: str
     
+    # Реплика для чтения (GET-эндпоинты); после записи пользователя его чтения
+    # READ_YOUR_WRITES_WINDOW секунд идут в основную БД
+    DATABASE_REPLICA_URL: Optional[str] = None
+    READ_YOUR_WRITES_WINDOW: float = 5.0
+    
+    # Профиль движка БД: tuned — pragma для SQLite и настраиваемый пул для серверных БД,
+    # default — настройки SQLAlchemy по умолчанию
+    DATABASE_PROFILE: str = "tuned"
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268435456  # байт
+    SQLITE_CACHE_SIZE: int = -65536  # отрицательное значение — в КиБ
+    SQLITE_BUSY_TIMEOUT: int = 5000  # мс
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # с
+    
     # Настройки Redis
     REDIS_URL: Optional[str] = None
     
@@ -21,6 +50,77 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = None
     GOOGLE_BOOKS_API_KEY: Optional[str] = None
     
+    # Настройки HTTP-клиентов для внешних API
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = False
+    GOOGLE_BOOKS_BASE_URL: str = "https://www.googleapis.com/books/v1"
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    GOOGLE_BOOKS_TIMEOUT: float = 10.0
+    OPENAI_TIMEOUT: float = 30.0
+    
+    # Изоляция внешних API: лимит параллельных вызовов и circuit breaker
+    GOOGLE_BOOKS_MAX_CONCURRENCY: int = 20
+    OPENAI_MAX_CONCURRENCY: int = 10
+    UPSTREAM_ACQUIRE_TIMEOUT: float = 0.5
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT: float = 30.0
+    CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS: int = 1
+    
+    # Настройки кэша книг
+    BOOK_CACHE_MAX_SIZE: int = 1024
+    BOOK_CACHE_TTL: float = 600.0
+    BOOK_DETAILS_CACHE_TTL: float = 86400.0
+    BOOK_CACHE_USE_REDIS: bool = True
+    
+    # Локальный каталог книг
+    CATALOG_ENABLED: bool = True
+    CATALOG_MIN_RESULTS: int = 3
+    
+    # Рекомендации по избранному (item-item)
+    RECOMMENDATIONS_REFRESH_INTERVAL: float = 300.0
+    
+    # Индекс похожих книг (TF-IDF по каталогу)
+    SIMILARITY_INDEX_DIR: str = "data/similarity_index"
+    SIMILARITY_REFRESH_INTERVAL: float = 600.0
+    SIMILARITY_RELOAD_CHECK_INTERVAL: float = 5.0
+    
+    # Кэш ответов OpenAI
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_SIZE: int = 2048
+    LLM_CACHE_TTL: float = 3600.0
+    LLM_CACHE_USE_REDIS: bool = True
+    
+    # Контекст диалога для OpenAI
+    CONTEXT_TOKEN_BUDGET: int = 1500
+    CONTEXT_FOLD_TARGET: float = 0.5
+    CONTEXT_SUMMARY_MAX_TOKENS: int = 300
+    
+    # Чаты с сообщениями (GET /chat/chats и /chat/chats/{id}): последние сообщения каждого чата,
+    # полная история — постранично через /chat/chats/{id}/messages
+    CHAT_LIST_MESSAGES_PER_CHAT: int = 50
+    
+    # Профилирование запросов (заголовок X-Profile: <PROFILING_TOKEN> или доля случайных запросов)
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_BUFFER_SIZE: int = 50
+    
+    # Ограничение частоты запросов (скользящее окно; через Redis — общий лимит для всех воркеров)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_USE_REDIS: bool = True
+    RATE_LIMIT_WINDOW: float = 60.0
+    RATE_LIMIT_READ_PER_USER: int = 300
+    RATE_LIMIT_READ_PER_IP: int = 600
+    RATE_LIMIT_CHAT_PER_USER: int = 20
+    RATE_LIMIT_CHAT_PER_IP: int = 60
+    
+    # Сжатие ответов (brotli — при установленном пакете brotli, иначе gzip)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESSION_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    
     # Настройки CORS
     ALLOWED_ORIGINS: list = ["http://localhost:3000", "http://127.0.0.1:3000"]
     
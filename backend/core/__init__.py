@@ -4,7 +4,7 @@ from .security import (
     create_access_token,
     decode_access_token
 )
-from .database import SessionLocal, engine, Base
+from .database import SessionLocal, engine, Base, AsyncSessionLocal, async_engine
 
 __all__ = [
     "verify_password",
@@ -13,5 +13,7 @@ __all__ = [
     "decode_access_token",
     "SessionLocal",
     "engine",
-    "Base"
+    "Base",
+    "AsyncSessionLocal",
+    "async_engine"
 ]
\ No newline at end of file
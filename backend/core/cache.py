@@ -0,0 +1,253 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from config.settings import settings
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    LRU-кэш в памяти процесса с ограничением размера и временем жизни записей
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+class RedisCache:
+    """
+    Общий кэш в Redis (settings.REDIS_URL). Значения хранятся в JSON.
+    При недоступности Redis ошибки не пробрасываются, а tier отключается на error_backoff секунд
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: float, error_backoff: float = 30.0):
+        self.url = url
+        self.prefix = prefix
+        self.ttl = ttl
+        self.error_backoff = error_backoff
+        self._client = None
+        self._disabled_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _get_client(self):
+        if self._client is None:
+            import redis.asyncio as redis
+            self._client = redis.from_url(self.url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._client
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    def _on_error(self) -> None:
+        self.errors += 1
+        self._disabled_until = time.monotonic() + self.error_backoff
+
+    async def get(self, key: str, default: Any = _MISSING) -> Any:
+        if not self._available():
+            return default
+        try:
+            raw = await self._get_client().get(self.prefix + key)
+        except Exception:
+            self._on_error()
+            return default
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if not self._available():
+            return
+        try:
+            await self._get_client().set(
+                self.prefix + key,
+                json.dumps(value, ensure_ascii=False),
+                ex=max(1, int(self.ttl if ttl is None else ttl))
+            )
+        except Exception:
+            self._on_error()
+
+    async def delete(self, key: str) -> None:
+        if not self._available():
+            return
+        try:
+            await self._get_client().delete(self.prefix + key)
+        except Exception:
+            self._on_error()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "available": self._available()
+        }
+
+class TwoTierCache:
+    """
+    Двухуровневый кэш: локальный TTLCache + необязательный RedisCache.
+    Одновременные запросы с одинаковым ключом схлопываются в один вызов loader (singleflight)
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float, redis_url: Optional[str] = None):
+        self.name = name
+        self.local = TTLCache(max_size=max_size, ttl=ttl)
+        self.remote = RedisCache(redis_url, prefix=f"{name}:", ttl=ttl) if redis_url else None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.requests = 0
+        self.hits = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        self.requests += 1
+        value = self.local.get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            # Ожидание чужой загрузки — не попадание в кэш, считается отдельно
+            self.coalesced += 1
+        else:
+            # Загрузка — отдельная задача: отмена первого запроса (клиент отключился)
+            # не прерывает ее для остальных ожидающих
+            task = asyncio.get_running_loop().create_task(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._load_done(key, done))
+        return await asyncio.shield(task)
+
+    def _load_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Помечаем исключение как полученное, если все ожидающие уже отменены
+            task.exception()
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self._get_remote(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.loads += 1
+        value = await loader()
+        await self.set(key, value)
+        return value
+
+    async def _get_remote(self, key: str) -> Any:
+        if self.remote is None:
+            return _MISSING
+        value = await self.remote.get(key)
+        if value is not _MISSING:
+            self.local.set(key, value)
+        return value
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """
+        Чтение без loader — для значений, которые собираются по частям (например, потоковый ответ)
+        """
+        self.requests += 1
+        value = self.local.get(key)
+        if value is _MISSING:
+            value = await self._get_remote(key)
+        if value is _MISSING:
+            return default
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        if self.remote is not None:
+            await self.remote.set(key, value)
+
+    async def invalidate(self, key: str) -> None:
+        self.local.delete(key)
+        if self.remote is not None:
+            await self.remote.delete(key)
+
+    async def close(self) -> None:
+        if self.remote is not None:
+            await self.remote.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local": self.local.stats(),
+            "redis": self.remote.stats() if self.remote is not None else None,
+            "requests": self.requests,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.requests if self.requests else 0.0,  # без coalesced
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight)
+        }
+
+def create_cache(name: str, max_size: int, ttl: float, use_redis: bool = True) -> TwoTierCache:
+    """
+    Создает двухуровневый кэш; Redis подключается, только если задан settings.REDIS_URL
+    """
+    redis_url = settings.REDIS_URL if use_redis else None
+    return TwoTierCache(name, max_size=max_size, ttl=ttl, redis_url=redis_url)
@@ -0,0 +1,91 @@
+"""
+Сжатие ответов: brotli (если установлен пакет brotli) или gzip, начиная с порога размера.
+Сжимаются только ответы, отданные одним куском: потоковые (SSE) проходят без изменений
+"""
+import gzip
+from typing import Any, Optional
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    br или gzip по заголовку Accept-Encoding; кодировки с q=0 пропускаются
+    """
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+class CompressionMiddleware:
+    def __init__(self, app: Any, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Заголовки придерживаются до первого куска тела: от него зависит Content-Encoding
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            if message.get("more_body") or len(body) < self.minimum_size or not _compressible(headers):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send({**start, "headers": headers.raw})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,15 +1,113 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config.settings import settings
 
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def get_async_database_url(url: str) -> str:
+    """
+    Подставляет асинхронный драйвер (aiosqlite/asyncpg) в URL базы данных
+    """
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        scheme = scheme.split("+", 1)[0]
+    if scheme not in _ASYNC_DRIVERS:
+        raise ValueError(
+            f"DATABASE_URL: схема {scheme!r} не поддерживается асинхронными эндпоинтами "
+            f"(поддерживаются: {', '.join(sorted(_ASYNC_DRIVERS))})"
+        )
+    return _ASYNC_DRIVERS[scheme] + sep + rest
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def pool_options(url: str, profile: str) -> Dict[str, Any]:
+    """
+    Параметры пула для серверных БД в профиле tuned. SQLite пул не настраивается:
+    запись в файл все равно последовательна, вместо этого применяются pragma
+    """
+    if profile != "tuned" or is_sqlite(url):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    # busy_timeout первым: смена journal_mode сама может ждать блокировку
+    return {
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+    }
+
+def tune_engine(engine: Engine, url: str, profile: str) -> None:
+    """
+    Профиль tuned для SQLite: WAL (читатели не блокируют писателя), synchronous=NORMAL,
+    mmap, кэш страниц и ожидание блокировки вместо немедленного "database is locked".
+    Pragma действуют на соединение, поэтому применяются при каждом подключении
+    """
+    if profile != "tuned" or not is_sqlite(url):
+        return
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+    connect_args={"check_same_thread": False} if is_sqlite(settings.DATABASE_URL) else {},
+    **pool_options(settings.DATABASE_URL, settings.DATABASE_PROFILE)
 )
+tune_engine(engine, settings.DATABASE_URL, settings.DATABASE_PROFILE)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Реплика только для чтения; без DATABASE_REPLICA_URL чтение идет в основную БД
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(
+        settings.DATABASE_REPLICA_URL,
+        connect_args={"check_same_thread": False} if is_sqlite(settings.DATABASE_REPLICA_URL) else {},
+        **pool_options(settings.DATABASE_REPLICA_URL, settings.DATABASE_PROFILE)
+    )
+    tune_engine(replica_engine, settings.DATABASE_REPLICA_URL, settings.DATABASE_PROFILE)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+else:
+    replica_engine = None
+    ReplicaSessionLocal = SessionLocal
+
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    **pool_options(settings.DATABASE_URL, settings.DATABASE_PROFILE)
+)
+tune_engine(async_engine.sync_engine, settings.DATABASE_URL, settings.DATABASE_PROFILE)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -17,4 +115,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
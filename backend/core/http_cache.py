@@ -0,0 +1,56 @@
+"""
+Условные GET-запросы: слабые ETag по дешевым версиям данных, Last-Modified и ответ 304 без тела
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+from fastapi import Request, Response
+
+# Браузер хранит ответ, но перед использованием всегда переспрашивает сервер
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts: Any) -> str:
+    """
+    Слабый ETag: тело одинаково по смыслу, но может отличаться сжатием
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+def http_date(value: datetime) -> str:
+    # SQLite возвращает CURRENT_TIMESTAMP без часового пояса — это UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Слабое сравнение: префикс W/ не учитывается
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """
+    If-None-Match проверяется первым; If-Modified-Since — только без него (RFC 9110)
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, headers["ETag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    last_modified = headers.get("Last-Modified")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,85 @@
+import httpx
+from functools import lru_cache
+from typing import Dict, Optional
+from config.settings import settings
+
+GOOGLE_BOOKS = "google_books"
+OPENAI = "openai"
+
+_BASE_URLS = {
+    GOOGLE_BOOKS: settings.GOOGLE_BOOKS_BASE_URL,
+    OPENAI: settings.OPENAI_BASE_URL,
+}
+
+_TIMEOUTS = {
+    GOOGLE_BOOKS: settings.GOOGLE_BOOKS_TIMEOUT,
+    OPENAI: settings.OPENAI_TIMEOUT,
+}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_transport: Optional[httpx.AsyncBaseTransport] = None
+
+@lru_cache(maxsize=1)
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        # Пакет h2 ставится с httpx[http2] (requirements.txt); без него клиенты работают по HTTP/1.1
+        if settings.HTTP2_ENABLED:
+            print("HTTP/2 выключен: пакет h2 не установлен (pip install 'httpx[http2]')")
+        return False
+    return True
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+    return httpx.AsyncClient(
+        base_url=_BASE_URLS[name],
+        timeout=_TIMEOUTS[name],
+        limits=limits,
+        http2=settings.HTTP2_ENABLED and _http2_available(),
+        transport=_transport
+    )
+
+async def init_http_clients(transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+    """
+    Создает общие клиенты для внешних API (вызывается в lifespan).
+    transport позволяет подставить заглушку в тестах, например httpx.MockTransport
+    """
+    global _transport
+    await close_http_clients()
+    _transport = transport
+    for name in _BASE_URLS:
+        _clients[name] = _build_client(name)
+
+async def close_http_clients() -> None:
+    """
+    Закрывает общие клиенты и их пулы соединений
+    """
+    global _transport
+    clients = list(_clients.values())
+    _clients.clear()
+    # Заглушка из тестов не переживает закрытие: лениво созданные клиенты снова идут в сеть
+    _transport = None
+    for client in clients:
+        await client.aclose()
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """
+    Возвращает общий клиент для внешнего API.
+    Если lifespan не запускался (скрипты, тесты), клиент создается лениво
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        _clients[name] = client
+    return client
+
+def get_books_client() -> httpx.AsyncClient:
+    return get_http_client(GOOGLE_BOOKS)
+
+def get_openai_client() -> httpx.AsyncClient:
+    return get_http_client(OPENAI)
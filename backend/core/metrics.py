@@ -0,0 +1,285 @@
+"""
+Метрики в текстовом формате Prometheus без внешних зависимостей.
+Значения хранятся в памяти процесса: при нескольких воркерах uvicorn каждый отдает свои
+"""
+import bisect
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from core.resilience import UpstreamUnavailable, get_upstream_stats
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, labels)} {_format(value)}" for labels, value in items
+        ]
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [счетчики по корзинам (последняя — +Inf), сумма, количество]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items()]
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_format(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+# Коллектор — функция, возвращающая готовые метрики на момент запроса /metrics
+Collector = Callable[[], Iterable[_Metric]]
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Длительность HTTP-запросов", ("method", "route", "status")
+))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Запросы в обработке", ("method", "route")
+))
+DB_QUERIES_PER_REQUEST = REGISTRY.register(Histogram(
+    "db_queries_per_request", "Количество SQL-запросов на HTTP-запрос", ("route",), buckets=COUNT_BUCKETS
+))
+DB_TIME_PER_REQUEST = REGISTRY.register(Histogram(
+    "db_time_per_request_seconds", "Суммарное время SQL-запросов на HTTP-запрос", ("route",)
+))
+DB_QUERY_DURATION = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Длительность отдельных SQL-запросов", ("engine",)
+))
+UPSTREAM_DURATION = REGISTRY.register(Histogram(
+    "upstream_request_duration_seconds", "Длительность вызовов внешних API",
+    ("upstream", "operation", "outcome")
+))
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "upstream_calls", "upstream_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.upstream_calls = 0
+        self.upstream_time = 0.0
+
+# Счетчики SQL и внешних вызовов текущего HTTP-запроса; контекст копируется в пул потоков, объект общий
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Подписывается на события движка: время каждого SQL-запроса и счетчики текущего HTTP-запроса
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        DB_QUERY_DURATION.observe(elapsed, name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+def _route_template(app: Any, scope: Dict[str, Any]) -> str:
+    # Шаблон пути вместо фактического URL, чтобы id не раздували число рядов
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: гистограмма длительности и число запросов в обработке по шаблону маршрута,
+    количество и время SQL на запрос
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope["app"], scope)
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        HTTP_REQUESTS_IN_FLIGHT.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method, route, status)
+            HTTP_REQUESTS_IN_FLIGHT.dec(method, route)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, route)
+            DB_TIME_PER_REQUEST.observe(stats.db_time, route)
+            _request_stats.reset(token)
+
+@asynccontextmanager
+async def observe_upstream(upstream: str, operation: str) -> AsyncIterator[None]:
+    """
+    Замер вызова внешнего API; outcome: success, error, rejected (bulkhead/circuit breaker), cancelled
+    """
+    started = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except UpstreamUnavailable:
+        outcome = "rejected"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    except BaseException:
+        outcome = "cancelled"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_DURATION.observe(elapsed, upstream, operation, outcome)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.upstream_calls += 1
+            stats.upstream_time += elapsed
+
+def _upstream_collector() -> List[_Metric]:
+    circuit_open = Gauge("upstream_circuit_open", "1, если цепь внешнего API разомкнута или в half_open", ("upstream",))
+    in_flight = Gauge("upstream_in_flight", "Вызовы внешнего API в процессе", ("upstream",))
+    rejected = Counter("upstream_rejected_total", "Вызовы, отклоненные без обращения к API", ("upstream", "reason"))
+    for name, stats in get_upstream_stats().items():
+        circuit_open.set(name, value=0 if stats["state"] == "closed" else 1)
+        in_flight.set(name, value=stats["in_flight"])
+        rejected.inc(name, "bulkhead", amount=stats["rejected"])
+        rejected.inc(name, "circuit_open", amount=stats["short_circuited"])
+    return [circuit_open, in_flight, rejected]
+
+REGISTRY.add_collector(_upstream_collector)
+
+def render_metrics() -> str:
+    return REGISTRY.render()
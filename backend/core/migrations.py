@@ -0,0 +1,60 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+from core.database import Base
+
+# Колонки, добавленные к уже существующим таблицам: (таблица, колонка, DDL, SQL заполнения)
+ADDED_COLUMNS = [
+    (
+        "chats", "message_count", "INTEGER NOT NULL DEFAULT 0",
+        "UPDATE chats SET message_count = (SELECT COUNT(*) FROM messages WHERE messages.chat_id = chats.id)"
+    ),
+    ("chats", "summary", "TEXT", None),
+    ("chats", "summary_message_id", "INTEGER", None),
+    ("users", "favorites_version", "INTEGER NOT NULL DEFAULT 0", None),
+    ("users", "chats_version", "INTEGER NOT NULL DEFAULT 0", None),
+    ("chats", "version", "INTEGER NOT NULL DEFAULT 0", None),
+    ("book_catalog", "version", "INTEGER NOT NULL DEFAULT 0", None),
+]
+
+# Уникальные индексы поверх данных, где могут быть дубли: (таблица, индекс, SQL очистки).
+# Очистка выполняется один раз — пока индекса еще нет
+UNIQUE_INDEX_CLEANUP = [
+    (
+        "favorite_books", "ux_favorite_books_user_book",
+        "DELETE FROM favorite_books WHERE id NOT IN "
+        "(SELECT MIN(id) FROM favorite_books GROUP BY user_id, book_id)"
+    ),
+]
+
+def upgrade_schema(engine: Engine) -> None:
+    """
+    Доводит существующую БД до текущих моделей.
+    create_all создает только новые таблицы, но не добавляет колонки и индексы к старым
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table, column, ddl, backfill in ADDED_COLUMNS:
+            if table not in existing_tables:
+                continue
+            columns = {c["name"] for c in inspector.get_columns(table)}
+            if column in columns:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            if backfill:
+                conn.execute(text(backfill))
+
+        for table, index_name, cleanup in UNIQUE_INDEX_CLEANUP:
+            if table not in existing_tables:
+                continue
+            if index_name in {i["name"] for i in inspector.get_indexes(table)}:
+                continue
+            # Остается самая ранняя запись каждой пары
+            conn.execute(text(cleanup))
+
+        # IF NOT EXISTS вместо checkfirst: рефлексия не видит индексы по выражениям
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
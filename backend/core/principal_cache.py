@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from config.settings import settings
+from core.cache import TTLCache
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    Неизменяемый снимок пользователя, безопасный для переиспользования между запросами и потоками
+    """
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            created_at=user.created_at,
+            updated_at=user.updated_at
+        )
+
+class PrincipalCache:
+    """
+    Кэш проверенных токенов: токен -> снимок пользователя.
+    Запись живет не дольше ttl и exp токена. Инвалидация по пользователю — через номер
+    инвалидации, без перебора токенов: запись, прочитанная до инвалидации, отбрасывается.
+
+    Кэш свой у каждого воркера, инвалидация действует только в текущем процессе:
+    смена пароля или деактивация в других воркерах видна не позже чем через ttl
+    (PRINCIPAL_CACHE_TTL)
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._tokens = TTLCache(max_size=max_size, ttl=ttl)
+        # username -> (номер инвалидации, monotonic-время); старше ttl не нужны — записи
+        # токенов, прочитанные до них, уже истекли
+        self._invalidated: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._max_invalidated = max(max_size, 1)
+        # Наибольший номер вытесненной свежей инвалидации: записи, прочитанные до него, отбрасываются
+        # для всех пользователей — лишнее чтение из БД вместо устаревшего снимка
+        self._floor = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    def version(self, username: str) -> int:
+        """
+        Метка для put: номер последней инвалидации на момент чтения пользователя из БД
+        """
+        with self._lock:
+            return self._sequence
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        with self._lock:
+            entry: Optional[Tuple[UserSnapshot, int]] = self._tokens.get(token, None)
+            if entry is None:
+                return None
+            snapshot, version = entry
+            if self._is_stale(snapshot.username, version):
+                self._tokens.delete(token)
+                return None
+            return snapshot
+
+    def put(self, token: str, snapshot: UserSnapshot, version: int, expires_at: Optional[float]) -> None:
+        """
+        version берется до чтения пользователя из БД, чтобы не закэшировать устаревший снимок
+        """
+        ttl = self._tokens.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            if self._is_stale(snapshot.username, version):
+                # Пользователя изменили, пока читали его из БД
+                return
+            self._tokens.set(token, (snapshot, version), ttl=ttl)
+
+    def _is_stale(self, username: str, version: int) -> bool:
+        if self._floor > version:
+            return True
+        invalidated = self._invalidated.get(username)
+        return invalidated is not None and invalidated[0] > version
+
+    def _prune(self, now: float) -> None:
+        while self._invalidated:
+            _, (_, invalidated_at) = next(iter(self._invalidated.items()))
+            if now - invalidated_at < self._tokens.ttl:
+                break
+            self._invalidated.popitem(last=False)
+        while len(self._invalidated) > self._max_invalidated:
+            # Слишком много свежих инвалидаций: самые старые заменяются общей границей _floor
+            _, (sequence, _) = self._invalidated.popitem(last=False)
+            self._floor = max(self._floor, sequence)
+
+    def invalidate_user(self, username: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sequence += 1
+            self._invalidated[username] = (self._sequence, now)
+            self._invalidated.move_to_end(username)
+            self._prune(now)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._invalidated.clear()
+            # Снимки, которые читаются из БД прямо сейчас, тоже не должны попасть в кэш
+            self._floor = self._sequence
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._tokens.stats()
+            stats["tracked_invalidations"] = len(self._invalidated)
+        stats["invalidations"] = self.invalidations
+        return stats
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL
+)
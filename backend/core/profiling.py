@@ -0,0 +1,257 @@
+"""
+Выборочное профилирование запросов: семплирующий профайлер стеков и разбивка времени
+(SQL, внешние API, сериализация). Результаты — в кольцевом буфере, формат — speedscope JSON
+"""
+import asyncio
+import itertools
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from config.settings import settings
+from core.metrics import current_request_stats
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+FrameKey = Tuple[str, str, int]
+
+# Функции, в которых поток простаивает: такие семплы не относятся к обработке запроса
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+# Кадры сериализации ответа: jsonable_encoder, валидация response_model, render ответа,
+# быстрый путь (dict из строк БД и FastJSONResponse)
+_SERIALIZATION_FRAMES = (
+    ("fastapi/encoders.py", ""),
+    ("fastapi/routing.py", "serialize_response"),
+    ("starlette/responses.py", "render"),
+    ("fastapi/responses.py", "render"),
+    ("core/responses.py", "render"),
+    ("schemas/chat.py", ""),
+    ("json/encoder.py", ""),
+)
+
+def _frame_key(frame) -> FrameKey:
+    code = frame.f_code
+    return code.co_filename, code.co_name, code.co_firstlineno
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (code.co_filename.rsplit("/", 1)[-1], code.co_name) in _IDLE_FRAMES
+
+def _is_serialization(stack: Tuple[FrameKey, ...]) -> bool:
+    for filename, name, _ in stack:
+        for suffix, function in _SERIALIZATION_FRAMES:
+            if filename.endswith(suffix) and (not function or name == function):
+                return True
+    return False
+
+class StackSampler:
+    """
+    Фоновый поток, снимающий стеки всех занятых потоков процесса каждые interval секунд.
+    В стеки event loop попадают и другие запросы, выполняющиеся одновременно.
+    Время сериализации считается только по потоку request_thread — иначе семплы
+    нескольких потоков в сумме превышают реальное время запроса
+    """
+
+    def __init__(self, interval: float, request_thread: Optional[int] = None):
+        self.interval = interval
+        self.request_thread = request_thread
+        self.stacks: Counter = Counter()
+        self.serialization = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        # Поток просыпается не позже чем через interval; дольше timeout не ждем
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight = now - last
+            last = now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or _is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_key(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                key = tuple(stack)
+                self.stacks[key] += weight
+                if thread_id == self.request_thread and _is_serialization(key):
+                    self.serialization += weight
+
+@dataclass
+class RequestProfile:
+    id: int
+    method: str
+    path: str
+    started_at: float
+    duration: float = 0.0
+    status: Optional[int] = None
+    breakdown: Dict[str, float] = field(default_factory=dict)
+    stacks: Dict[Tuple[FrameKey, ...], float] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "breakdown": self.breakdown
+        }
+
+    def to_speedscope(self) -> Dict[str, Any]:
+        frames: List[Dict[str, Any]] = []
+        index: Dict[FrameKey, int] = {}
+        samples = []
+        weights = []
+        for stack, weight in self.stacks.items():
+            sample = []
+            for key in stack:
+                if key not in index:
+                    index[key] = len(frames)
+                    filename, name, line = key
+                    frames.append({"name": name, "file": filename, "line": line})
+                sample.append(index[key])
+            samples.append(sample)
+            weights.append(round(weight * 1000, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.method} {self.path}",
+            "exporter": settings.APP_NAME,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{self.method} {self.path} ({self.status})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights
+            }],
+            "activeProfileIndex": 0
+        }
+
+class ProfileStore:
+    """
+    Кольцевой буфер последних профилей
+    """
+
+    def __init__(self, max_size: int):
+        self._profiles: Deque[RequestProfile] = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [profile.summary() for profile in reversed(self._profiles)]
+
+profile_store = ProfileStore(settings.PROFILING_BUFFER_SIZE)
+
+def is_profiling_token(value: Optional[str]) -> bool:
+    return bool(settings.PROFILING_TOKEN) and value == settings.PROFILING_TOKEN
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос, если заголовок X-Profile совпадает с PROFILING_TOKEN, либо
+    с вероятностью PROFILING_SAMPLE_RATE. Одновременно профилируется не больше одного запроса.
+    Разбивка SQL/внешних API берется из счетчиков core.metrics, поэтому middleware
+    должен стоять внутри MetricsMiddleware
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+        self._busy = threading.Lock()
+
+    def _should_profile(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return is_profiling_token(value.decode("latin-1"))
+        return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            profile = RequestProfile(
+                id=profile_store.next_id(),
+                method=scope["method"],
+                path=scope["path"],
+                started_at=time.time()
+            )
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    profile.status = message["status"]
+                    headers = list(message.get("headers", []))
+                    headers.append((PROFILE_ID_HEADER, str(profile.id).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            stats = current_request_stats()
+            queries_before = stats.queries if stats else 0
+            db_before = stats.db_time if stats else 0.0
+            upstream_before = stats.upstream_time if stats else 0.0
+
+            # Поток event loop: в нем выполняются middleware, render и jsonable_encoder
+            sampler = StackSampler(settings.PROFILING_INTERVAL_MS / 1000, threading.get_ident())
+            sampler.start()
+            started = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profile.duration = time.perf_counter() - started
+                # join в отдельном потоке: event loop не ждет пробуждения семплера
+                await asyncio.to_thread(sampler.stop)
+                profile.stacks = dict(sampler.stacks)
+                serialization = min(sampler.serialization, profile.duration)
+                sql = (stats.db_time - db_before) if stats else 0.0
+                upstream = (stats.upstream_time - upstream_before) if stats else 0.0
+                profile.breakdown = {
+                    "total_ms": round(profile.duration * 1000, 3),
+                    "sql_ms": round(sql * 1000, 3),
+                    "sql_queries": (stats.queries - queries_before) if stats else 0,
+                    "upstream_ms": round(upstream * 1000, 3),
+                    # Оценка по семплам потока запроса, попавшим в сериализацию
+                    "serialization_ms": round(serialization * 1000, 3),
+                    "other_ms": round(max(profile.duration - sql - upstream - serialization, 0.0) * 1000, 3)
+                }
+                profile_store.add(profile)
+        finally:
+            self._busy.release()
@@ -0,0 +1,217 @@
+"""
+Ограничение частоты запросов по пользователю и IP: скользящее окно по двум соседним
+фиксированным окнам (счетчик предыдущего окна берется с весом оставшейся доли).
+Бэкенды: память процесса или Redis (settings.REDIS_URL) — общий лимит для всех воркеров
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from config.settings import settings
+from core.metrics import REGISTRY, Counter
+
+RATE_LIMIT_REJECTED = REGISTRY.register(Counter(
+    "rate_limit_rejected_total", "Запросы, отклоненные ограничением частоты", ("budget", "scope")
+))
+
+# Атомарная проверка и учет запроса; KEYS: текущее и предыдущее окно,
+# ARGV: вес предыдущего окна, лимит, время жизни ключа (мс)
+_SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[1]) + current < tonumber(ARGV[2]) then
+    current = redis.call('INCR', KEYS[1])
+    redis.call('PEXPIRE', KEYS[1], ARGV[3])
+    return {1, current, previous}
+end
+return {0, current, previous}
+"""
+
+class RateLimitExceeded(Exception):
+    def __init__(self, budget: str, scope: str, retry_after: float):
+        super().__init__(f"Превышен лимит запросов {budget} ({scope})")
+        self.budget = budget
+        self.scope = scope
+        self.retry_after = retry_after
+
+@dataclass(frozen=True)
+class Budget:
+    name: str
+    user_limit: int
+    ip_limit: int
+    window: float
+
+def retry_after(current: int, previous: int, elapsed: float, window: float, limit: int) -> float:
+    """
+    Через сколько секунд оценка previous * вес + current опустится ниже limit
+    """
+    if current >= limit:
+        # До конца окна, затем текущий счетчик станет предыдущим и должен "остыть"
+        return (window - elapsed) + max(0.0, window * (1 - limit / current))
+    if previous <= 0:
+        return 0.0
+    return max(0.0, window * (1 - (limit - current) / previous) - elapsed)
+
+def _window_position(window: float) -> Tuple[int, float]:
+    # Общие для всех процессов границы окон: от эпохи, а не от запуска процесса
+    now = time.time()
+    index = int(now // window)
+    return index, now - index * window
+
+class MemoryBackend:
+    """
+    Счетчики в памяти процесса: лимит действует на каждый воркер отдельно
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max(max_keys, 1)
+        # key -> [индекс окна, счетчик текущего окна, счетчик предыдущего];
+        # порядок — по последнему запросу, в начале ключи, к которым дольше всего не обращались
+        self._windows: "OrderedDict[str, list]" = OrderedDict()
+
+    def _prune(self) -> None:
+        # Вытесняем самые давние ключи, пока не освободится место под новый
+        while len(self._windows) >= self.max_keys:
+            self._windows.popitem(last=False)
+
+    async def hit(self, key: str, limit: int, window: float) -> Tuple[bool, int, int, float]:
+        index, elapsed = _window_position(window)
+        state = self._windows.get(key)
+        if state is None:
+            self._prune()
+            state = self._windows[key] = [index, 0, 0]
+        else:
+            self._windows.move_to_end(key)
+        if state[0] != index:
+            state[2] = state[1] if state[0] == index - 1 else 0
+            state[0], state[1] = index, 0
+
+        current, previous = state[1], state[2]
+        if previous * (1 - elapsed / window) + current < limit:
+            state[1] += 1
+            return True, state[1], previous, elapsed
+        return False, current, previous, elapsed
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "keys": len(self._windows)}
+
+class RedisBackend:
+    """
+    Счетчики в Redis, общие для всех воркеров. При недоступности Redis лимит на
+    error_backoff секунд считается в памяти процесса
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:", error_backoff: float = 30.0):
+        self.url = url
+        self.prefix = prefix
+        self.error_backoff = error_backoff
+        self.fallback = MemoryBackend()
+        self._client = None
+        self._script = None
+        self._disabled_until = 0.0
+        self.errors = 0
+
+    def _get_script(self):
+        if self._script is None:
+            import redis.asyncio as redis
+            self._client = redis.from_url(self.url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            self._script = self._client.register_script(_SLIDING_WINDOW_SCRIPT)
+        return self._script
+
+    async def hit(self, key: str, limit: int, window: float) -> Tuple[bool, int, int, float]:
+        if time.monotonic() < self._disabled_until:
+            return await self.fallback.hit(key, limit, window)
+        index, elapsed = _window_position(window)
+        # Хэш-тег {key}: оба окна в одном слоте Redis Cluster
+        keys = [f"{self.prefix}{{{key}}}:{index}", f"{self.prefix}{{{key}}}:{index - 1}"]
+        try:
+            allowed, current, previous = await self._get_script()(
+                keys=keys,
+                args=[1 - elapsed / window, limit, int(window * 2000)]
+            )
+        except Exception:
+            self.errors += 1
+            self._disabled_until = time.monotonic() + self.error_backoff
+            return await self.fallback.hit(key, limit, window)
+        return bool(allowed), int(current), int(previous), elapsed
+
+    async def close(self) -> None:
+        if self._client is not None:
+            client, self._client, self._script = self._client, None, None
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "errors": self.errors,
+            "available": time.monotonic() >= self._disabled_until,
+            "fallback": self.fallback.stats()
+        }
+
+class RateLimiter:
+    def __init__(self, budgets: Dict[str, Budget], backend: Any, enabled: bool = True):
+        self.budgets = budgets
+        self.backend = backend
+        self.enabled = enabled
+
+    async def _check(self, budget: Budget, scope: str, identity: Any, limit: int) -> None:
+        allowed, current, previous, elapsed = await self.backend.hit(
+            f"{budget.name}:{scope}:{identity}", limit, budget.window
+        )
+        if not allowed:
+            RATE_LIMIT_REJECTED.inc(budget.name, scope)
+            raise RateLimitExceeded(
+                budget.name, scope, retry_after(current, previous, elapsed, budget.window, limit)
+            )
+
+    async def check(self, budget_name: str, user_id: Optional[int], client_ip: Optional[str]) -> None:
+        """
+        Учитывает запрос в бюджете budget_name; сначала лимит IP, затем пользователя.
+        Бросает RateLimitExceeded с временем до следующей попытки
+        """
+        if not self.enabled:
+            return
+        budget = self.budgets[budget_name]
+        if client_ip is not None and budget.ip_limit > 0:
+            await self._check(budget, "ip", client_ip, budget.ip_limit)
+        if user_id is not None and budget.user_limit > 0:
+            await self._check(budget, "user", user_id, budget.user_limit)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "budgets": {
+                name: {"user_limit": b.user_limit, "ip_limit": b.ip_limit, "window": b.window}
+                for name, b in self.budgets.items()
+            },
+            **self.backend.stats()
+        }
+
+def create_rate_limiter() -> RateLimiter:
+    """
+    Бюджеты: read — дешевые чтения, chat — отправка сообщений (Google Books и OpenAI)
+    """
+    budgets = {
+        "read": Budget("read", settings.RATE_LIMIT_READ_PER_USER, settings.RATE_LIMIT_READ_PER_IP, settings.RATE_LIMIT_WINDOW),
+        "chat": Budget("chat", settings.RATE_LIMIT_CHAT_PER_USER, settings.RATE_LIMIT_CHAT_PER_IP, settings.RATE_LIMIT_WINDOW),
+    }
+    if settings.REDIS_URL and settings.RATE_LIMIT_USE_REDIS:
+        backend: Any = RedisBackend(settings.REDIS_URL)
+    else:
+        backend = MemoryBackend()
+    return RateLimiter(budgets, backend, enabled=settings.RATE_LIMIT_ENABLED)
+
+rate_limiter = create_rate_limiter()
+
+def retry_after_header(exc: RateLimitExceeded) -> str:
+    return str(max(1, math.ceil(exc.retry_after)))
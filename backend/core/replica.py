@@ -0,0 +1,138 @@
+"""
+Маршрутизация чтения на реплику (settings.DATABASE_REPLICA_URL) с защитой read-your-writes:
+после записи пользователя его чтения READ_YOUR_WRITES_WINDOW секунд идут в основную БД
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config.settings import settings
+from core.cache import TTLCache
+from core.metrics import REGISTRY, Counter
+
+# Ключ в Session.info: пользователь, от имени которого сессия пишет
+WRITER_KEY = "writer_user_id"
+
+READ_ROUTING = REGISTRY.register(Counter(
+    "db_read_sessions_total", "Сессии чтения по целевой БД", ("target",)
+))
+
+class WriteTracker:
+    """
+    Время последней записи пользователей. С Redis отметки видны всем воркерам;
+    при недоступности Redis на error_backoff секунд используются только локальные.
+    Из пула потоков отметка ставится синхронным клиентом, из цикла событий (AsyncSession) —
+    фоновой задачей на redis.asyncio, чтобы commit не ждал Redis
+    """
+
+    def __init__(self, window: float, redis_url: Optional[str] = None, max_size: int = 100000, error_backoff: float = 30.0):
+        self.window = window
+        self.redis_url = redis_url
+        self.error_backoff = error_backoff
+        self._local = TTLCache(max_size=max_size, ttl=window)
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_client = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._disabled_until = 0.0
+        self.errors = 0
+
+    def _get_client(self):
+        # Синхронный клиент: отметки ставятся и читаются в пуле потоков sync-эндпоинтов
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.redis_url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        return self._client
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            import redis.asyncio as redis
+            self._async_client = redis.from_url(self.redis_url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        return self._async_client
+
+    def _redis_available(self) -> bool:
+        return self.redis_url is not None and time.monotonic() >= self._disabled_until
+
+    def _on_error(self) -> None:
+        self.errors += 1
+        self._disabled_until = time.monotonic() + self.error_backoff
+
+    async def _mark_redis_async(self, user_id: int) -> None:
+        try:
+            await self._get_async_client().set(f"rw:{user_id}", 1, px=int(self.window * 1000))
+        except Exception:
+            self._on_error()
+
+    def mark(self, user_id: int) -> None:
+        with self._lock:
+            self._local.set(user_id, True)
+        if not self._redis_available():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            # commit AsyncSession идет в потоке цикла событий: синхронный Redis заблокировал бы его
+            task = loop.create_task(self._mark_redis_async(user_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+        try:
+            self._get_client().set(f"rw:{user_id}", 1, px=int(self.window * 1000))
+        except Exception:
+            self._on_error()
+
+    def recent(self, user_id: int) -> bool:
+        with self._lock:
+            if self._local.get(user_id, False):
+                return True
+        if self._redis_available():
+            try:
+                return bool(self._get_client().exists(f"rw:{user_id}"))
+            except Exception:
+                self._on_error()
+        return False
+
+    async def close(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._async_client is not None:
+            client, self._async_client = self._async_client, None
+            try:
+                await client.close()
+            except Exception:
+                pass
+        if self._client is not None:
+            client, self._client = self._client, None
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window": self.window,
+            "tracked": len(self._local),
+            "redis": self.redis_url is not None,
+            "pending": len(self._tasks),
+            "errors": self.errors
+        }
+
+write_tracker = WriteTracker(settings.READ_YOUR_WRITES_WINDOW, settings.REDIS_URL)
+
+def mark_writer(session: Any, user_id: int) -> None:
+    """
+    Помечает сессию (Session или AsyncSession) как пишущую от имени пользователя:
+    после каждого ее commit чтения пользователя временно идут в основную БД
+    """
+    session.info[WRITER_KEY] = user_id
+
+@event.listens_for(Session, "after_commit")
+def _remember_write(session: Session) -> None:
+    user_id = session.info.get(WRITER_KEY)
+    # Без реплики все чтения и так идут в основную БД
+    if user_id is not None and settings.DATABASE_REPLICA_URL:
+        write_tracker.mark(user_id)
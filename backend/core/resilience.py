@@ -0,0 +1,181 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict
+from config.settings import settings
+from core.http_client import GOOGLE_BOOKS, OPENAI
+
+class UpstreamUnavailable(Exception):
+    """
+    Вызов внешнего API отклонен без попытки: цепь разомкнута или нет свободных слотов
+    """
+
+class UpstreamError(Exception):
+    """
+    Внешний API ответил ошибкой, которая говорит о его неисправности (5xx, 429)
+    """
+
+def check_upstream_status(name: str, status_code: int) -> None:
+    """
+    Поднимает UpstreamError для статусов, которые должны учитываться circuit breaker.
+    Ошибки запроса (4xx) не размыкают цепь
+    """
+    if status_code >= 500 or status_code == 429:
+        raise UpstreamError(f"{name} вернул статус {status_code}")
+
+class CircuitBreaker:
+    """
+    Автомат closed -> open -> half_open. После failure_threshold ошибок подряд цепь
+    размыкается на recovery_timeout секунд, затем пропускает half_open_max_calls пробных вызовов
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        recovery_timeout: float,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.opened_count = 0
+        self._half_open_calls = 0
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if self.clock() - self.opened_at < self.recovery_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._half_open_calls = 0
+        if self.state == self.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                return False
+            self._half_open_calls += 1
+        return True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def release(self) -> None:
+        # Пробный вызов не завершился (отмена или отказ по слотам): освобождаем его место
+        if self.state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def _open(self) -> None:
+        if self.state != self.OPEN:
+            self.opened_count += 1
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+
+class UpstreamGuard:
+    """
+    Bulkhead (ограничение параллельных вызовов) и circuit breaker для одного внешнего API.
+    Использование: async with guard: ... — исключение внутри блока считается сбоем
+    """
+
+    def __init__(self, name: str, max_concurrency: int, acquire_timeout: float, breaker: CircuitBreaker):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self.breaker = breaker
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.short_circuited = 0
+
+    async def __aenter__(self) -> "UpstreamGuard":
+        if not self.breaker.allow():
+            self.short_circuited += 1
+            raise UpstreamUnavailable(f"{self.name}: цепь разомкнута")
+
+        if not await self._acquire():
+            self.rejected += 1
+            self.breaker.release()
+            raise UpstreamUnavailable(f"{self.name}: нет свободных слотов")
+
+        self.in_flight += 1
+        return self
+
+    async def _acquire(self) -> bool:
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return True
+        if self.acquire_timeout <= 0:
+            return False
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        self.in_flight -= 1
+        self._semaphore.release()
+        if exc_type is None:
+            self.successes += 1
+            self.breaker.record_success()
+        elif issubclass(exc_type, Exception):
+            self.failures += 1
+            self.breaker.record_failure()
+        else:
+            # Отмена запроса клиентом не говорит о состоянии внешнего API
+            self.breaker.release()
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "opened_count": self.breaker.opened_count,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "short_circuited": self.short_circuited
+        }
+
+_MAX_CONCURRENCY = {
+    GOOGLE_BOOKS: lambda: settings.GOOGLE_BOOKS_MAX_CONCURRENCY,
+    OPENAI: lambda: settings.OPENAI_MAX_CONCURRENCY,
+}
+
+_guards: Dict[str, UpstreamGuard] = {}
+
+def get_upstream_guard(name: str) -> UpstreamGuard:
+    guard = _guards.get(name)
+    if guard is None:
+        guard = UpstreamGuard(
+            name,
+            max_concurrency=_MAX_CONCURRENCY[name](),
+            acquire_timeout=settings.UPSTREAM_ACQUIRE_TIMEOUT,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                recovery_timeout=settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+                half_open_max_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS
+            )
+        )
+        _guards[name] = guard
+    return guard
+
+def get_upstream_stats() -> Dict[str, Any]:
+    """
+    Состояние цепей и счетчики отказов по внешним API
+    """
+    return {name: get_upstream_guard(name).stats() for name in _MAX_CONCURRENCY}
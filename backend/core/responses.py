@@ -0,0 +1,15 @@
+"""
+Быстрые JSON-ответы для больших выдач (история чатов)
+"""
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    Ответ через orjson для уже подготовленных dict/list: FastAPI не валидирует его по
+    response_model и не прогоняет через jsonable_encoder. Даты в UTC — с суффиксом "Z", как у pydantic
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
@@ -1,10 +1,29 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from config.settings import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max_rounds равны целевой стоимости: хэши с другой стоимостью помечаются как устаревшие
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
+
+class PasswordHasherBusy(Exception):
+    """
+    Очередь на хэширование паролей переполнена
+    """
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_lock = threading.Lock()
+_hash_pending = 0
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,6 +31,52 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash"
+            )
+        return _hash_executor
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    with _hash_lock:
+        executor, _hash_executor = _hash_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+async def _run_hasher(func, *args):
+    """
+    Выполняет bcrypt в отдельном ограниченном пуле, чтобы всплеск логинов
+    не занимал общий пул потоков Starlette. При переполнении очереди — PasswordHasherBusy
+    """
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE:
+            raise PasswordHasherBusy()
+        _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        with _hash_lock:
+            _hash_pending -= 1
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hasher(get_password_hash, password)
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Проверяет пароль; если стоимость bcrypt в хэше отличается от BCRYPT_ROUNDS,
+    вторым элементом возвращается новый хэш
+    """
+    return await _run_hasher(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -23,12 +88,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def decode_access_token(token: str):
+def decode_access_token_payload(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+        if payload.get("sub") is None:
             return None
-        return username
+        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def decode_access_token(token: str):
+    payload = decode_access_token_payload(token)
+    if payload is None:
+        return None
+    return payload["sub"]
\ No newline at end of file
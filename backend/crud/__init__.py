@@ -1,6 +1,6 @@
 from .user import get_user, get_user_by_username, create_user, update_user
 from .chat import (
-    get_chat, get_user_chats, create_chat, 
+    get_chat, get_user_chats, get_user_chat_summaries, create_chat, 
     update_chat, delete_chat, create_message,
     get_chat_messages, get_favorite_books,
     add_favorite_book, remove_favorite_book
@@ -8,7 +8,7 @@ from .chat import (
 
 __all__ = [
     "get_user", "get_user_by_username", "create_user", "update_user",
-    "get_chat", "get_user_chats", "create_chat", "update_chat",
+    "get_chat", "get_user_chats", "get_user_chat_summaries", "create_chat", "update_chat",
     "delete_chat", "create_message", "get_chat_messages",
     "get_favorite_books", "add_favorite_book", "remove_favorite_book"
 ]
\ No newline at end of file
@@ -0,0 +1,136 @@
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Iterable, Tuple, Optional
+from models.book import CatalogBook
+
+_CATALOG_FIELDS = [
+    "title", "author", "genre", "description",
+    "rating", "page_count", "cover_url", "preview_link"
+]
+
+def catalog_book_to_dict(book: CatalogBook) -> Dict[str, Any]:
+    return {
+        "id": book.book_id,
+        "title": book.title,
+        "author": book.author or "",
+        "description": book.description or "",
+        "genre": book.genre or "",
+        "rating": book.rating or 0,
+        "page_count": book.page_count,
+        "cover_url": book.cover_url or "",
+        "preview_link": book.preview_link or ""
+    }
+
+def _fts_query(terms: List[str]) -> str:
+    # Каждое слово ищется по префиксу, все слова должны встретиться
+    return " AND ".join('"{}"*'.format(term.replace('"', '')) for term in terms)
+
+def search_catalog(db: Session, terms: List[str], limit: int = 10) -> List[Dict[str, Any]]:
+    if not terms:
+        return []
+
+    if db.bind.dialect.name == "sqlite":
+        rows = db.execute(
+            text(
+                "SELECT rowid FROM book_catalog_fts WHERE book_catalog_fts MATCH :query "
+                "ORDER BY bm25(book_catalog_fts, 10.0, 5.0, 3.0, 1.0) LIMIT :limit"
+            ),
+            {"query": _fts_query(terms), "limit": limit}
+        ).all()
+        ids = [row[0] for row in rows]
+        if not ids:
+            return []
+        books = {book.id: book for book in db.query(CatalogBook).filter(CatalogBook.id.in_(ids))}
+        return [catalog_book_to_dict(books[book_id]) for book_id in ids if book_id in books]
+
+    # Для остальных СУБД — поиск по подстроке
+    query = db.query(CatalogBook)
+    for term in terms:
+        pattern = f"%{term}%"
+        query = query.filter(or_(
+            CatalogBook.title.ilike(pattern),
+            CatalogBook.author.ilike(pattern),
+            CatalogBook.genre.ilike(pattern),
+            CatalogBook.description.ilike(pattern)
+        ))
+    return [catalog_book_to_dict(book) for book in query.order_by(CatalogBook.rating.desc()).limit(limit)]
+
+# Книг в одном INSERT: 9 параметров на книгу, укладываемся в лимит переменных старых SQLite (999)
+CATALOG_UPSERT_CHUNK = 100
+
+def _catalog_upsert(dialect_name: str, rows: List[Dict[str, Any]]):
+    """
+    INSERT ... ON CONFLICT (book_id) DO UPDATE: пустые поля новой версии не затирают
+    заполненные, а строка без изменений не переписывается — updated_at и индекс FTS
+    (триггер на UPDATE) не трогаются при повторном сохранении тех же книг
+    """
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert(CatalogBook).values(rows)
+    merged = {
+        field: func.coalesce(stmt.excluded[field], CatalogBook.__table__.c[field])
+        for field in _CATALOG_FIELDS
+    }
+    return stmt.on_conflict_do_update(
+        index_elements=[CatalogBook.book_id],
+        set_={**merged, "version": CatalogBook.version + 1, "updated_at": func.now()},
+        where=or_(*(
+            CatalogBook.__table__.c[field].is_distinct_from(value) for field, value in merged.items()
+        ))
+    )
+
+def upsert_catalog_books(db: Session, books: Iterable[Dict[str, Any]]) -> int:
+    books = {str(book["id"]): book for book in books if book.get("id") and book.get("title")}
+    if not books:
+        return 0
+
+    # Одним выражением вместо SELECT + INSERT: параллельное сохранение той же книги
+    # (два поиска одновременно) не роняет весь пакет на IntegrityError
+    rows = [
+        {
+            "book_id": book_id,
+            **{
+                field: data.get(field) if data.get(field) not in (None, "") else None
+                for field in _CATALOG_FIELDS
+            }
+        }
+        for book_id, data in books.items()
+    ]
+    dialect_name = db.get_bind().dialect.name
+    for start in range(0, len(rows), CATALOG_UPSERT_CHUNK):
+        db.execute(_catalog_upsert(dialect_name, rows[start:start + CATALOG_UPSERT_CHUNK]))
+    db.commit()
+    return len(books)
+
+def get_catalog_signature(db: Session) -> Tuple[int, Optional[int], int]:
+    """
+    (количество, максимальный id, сумма версий) — меняется при любом добавлении или изменении книги.
+    Счетчик версий вместо max(updated_at): у того секундная точность, и изменение в ту же
+    секунду, что и построение индекса, оставалось незамеченным
+    """
+    count, max_id, versions = db.execute(
+        select(
+            func.count(CatalogBook.id),
+            func.max(CatalogBook.id),
+            func.coalesce(func.sum(CatalogBook.version), 0)
+        )
+    ).one()
+    return count, max_id, int(versions)
+
+def get_catalog_texts(db: Session) -> List[Tuple[str, str, Optional[str], Optional[str], Optional[str]]]:
+    rows = db.execute(
+        select(
+            CatalogBook.book_id,
+            CatalogBook.title,
+            CatalogBook.author,
+            CatalogBook.genre,
+            CatalogBook.description
+        ).order_by(CatalogBook.id)
+    )
+    return [tuple(row) for row in rows]
+
+def get_catalog_books(db: Session, book_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    if not book_ids:
+        return {}
+    books = db.query(CatalogBook).filter(CatalogBook.book_id.in_(book_ids))
+    return {book.book_id: catalog_book_to_dict(book) for book in books}
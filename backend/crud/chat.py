@@ -1,17 +1,150 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import select, update, delete, func, or_, and_, case, type_coerce, String
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any
 from models.chat import Chat, Message, FavoriteBook
+from models.user import User
 from schemas.chat import ChatCreate, MessageCreate
 
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+CHAT_TITLE_LENGTH = 50
+DEFAULT_CHAT_TITLE = "Новый чат"
+
+# Колонки сообщения для ответов API: строки читаются без ORM-объектов и identity map
+MESSAGE_COLUMNS = (Message.id, Message.chat_id, Message.content, Message.role, Message.meta)
+
+# Время последней активности чата: updated_at заполняется только после первого изменения
+chat_activity = func.coalesce(Chat.updated_at, Chat.created_at)
+
+def encode_chat_cursor(activity: datetime, chat_id: int) -> str:
+    raw = json.dumps([activity.isoformat(), chat_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_chat_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        activity, chat_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(activity), int(chat_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Неверный курсор") from exc
+
+def get_chat_cursor(chat: Chat) -> str:
+    return encode_chat_cursor(chat.updated_at or chat.created_at, chat.id)
+
+def _chats_before(dialect_name: str, cursor: str):
+    """
+    Условие keyset-пагинации: чаты строго после курсора в порядке (activity DESC, id DESC)
+    """
+    activity_value, chat_id = decode_chat_cursor(cursor)
+    activity: Any = chat_activity
+    if dialect_name == "sqlite":
+        # SQLite хранит даты чатов строкой без долей секунды (см. ChatTimestamp): сравниваем в том же формате
+        activity = type_coerce(chat_activity, String)
+        activity_value = activity_value.strftime("%Y-%m-%d %H:%M:%S")
+    return or_(activity < activity_value, and_(activity == activity_value, Chat.id < chat_id))
+
+def _chat_title(message: str) -> str:
+    return message[:CHAT_TITLE_LENGTH] + "..."
+
+def _touch_chat(chat_id: int, added: int, title: Optional[str] = None):
+    """
+    UPDATE чата после добавления сообщений: счетчик, updated_at и заголовок —
+    атомарно в SQL, без чтения текущего состояния чата
+    """
+    values = {
+        "message_count": Chat.message_count + added,
+        "version": Chat.version + 1,
+        "updated_at": func.now()
+    }
+    if title is not None:
+        # Заголовок меняется только у чата без сообщений
+        values["title"] = case((Chat.message_count == 0, title), else_=Chat.title)
+    return (
+        update(Chat)
+        .where(Chat.id == chat_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+def _chat_owner(chat_id: int):
+    return select(Chat.user_id).where(Chat.id == chat_id).scalar_subquery()
+
+def _bump_chats_version(user_id: Any):
+    """
+    Версия списка чатов пользователя для ETag; user_id — id или подзапрос _chat_owner.
+    Счетчик, а не updated_at: две записи за одну секунду дали бы одинаковый ETag
+    """
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(chats_version=User.chats_version + 1, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
 def get_chat(db: Session, chat_id: int, user_id: int) -> Optional[Chat]:
     return db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == user_id).first()
 
-def get_user_chats(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Chat]:
-    return db.query(Chat).filter(Chat.user_id == user_id).order_by(Chat.updated_at.desc()).offset(skip).limit(limit).all()
+def get_user_chats(db: Session, user_id: int, limit: int = 100, cursor: Optional[str] = None) -> List[Chat]:
+    query = db.query(Chat).filter(Chat.user_id == user_id)
+    if cursor:
+        query = query.filter(_chats_before(db.get_bind().dialect.name, cursor))
+    return query.order_by(chat_activity.desc(), Chat.id.desc()).limit(limit).all()
+
+def get_user_chat_summaries(
+    db: Session,
+    user_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Краткий список чатов одним запросом: количество сообщений и превью последнего
+    вместо загрузки всех сообщений каждого чата. Возвращает (строки, курсор следующей страницы)
+    """
+    last_message = (
+        select(func.substr(Message.content, 1, LAST_MESSAGE_PREVIEW_LENGTH))
+        .where(Message.chat_id == Chat.id)
+        .order_by(Message.id.desc())
+        .limit(1)
+        .correlate(Chat)
+        .scalar_subquery()
+    )
+    stmt = select(
+        Chat.id,
+        Chat.title,
+        Chat.created_at,
+        Chat.updated_at,
+        chat_activity.label("activity"),
+        Chat.message_count,
+        last_message.label("last_message")
+    ).where(Chat.user_id == user_id)
+    if cursor:
+        stmt = stmt.where(_chats_before(db.get_bind().dialect.name, cursor))
+    stmt = stmt.order_by(chat_activity.desc(), Chat.id.desc()).limit(limit + 1)
+
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_chat_cursor(rows[-1].activity, rows[-1].id)
+    return rows, next_cursor
+
+def get_chats_version(db: Session, user_id: int) -> int:
+    return db.scalar(select(User.chats_version).where(User.id == user_id)) or 0
+
+def get_chat_version(db: Session, chat_id: int, user_id: int) -> Optional[int]:
+    """
+    Версия одного чата для ETag. None, если чата нет или он чужой
+    """
+    return db.scalar(select(Chat.version).where(Chat.id == chat_id, Chat.user_id == user_id))
 
 def create_chat(db: Session, chat: ChatCreate, user_id: int) -> Chat:
     db_chat = Chat(**chat.dict(), user_id=user_id)
     db.add(db_chat)
+    db.execute(_bump_chats_version(user_id))
     db.commit()
     db.refresh(db_chat)
     return db_chat
@@ -22,6 +155,8 @@ def update_chat(db: Session, chat_id: int, user_id: int, title: str) -> Optional
         return None
     
     db_chat.title = title
+    db_chat.version = Chat.version + 1
+    db.execute(_bump_chats_version(user_id))
     db.commit()
     db.refresh(db_chat)
     return db_chat
@@ -32,6 +167,7 @@ def delete_chat(db: Session, chat_id: int, user_id: int) -> bool:
         return False
     
     db.delete(db_chat)
+    db.execute(_bump_chats_version(user_id))
     db.commit()
     return True
 
@@ -43,41 +179,434 @@ def create_message(db: Session, message: MessageCreate, chat_id: int) -> Message
         meta=message.metadata
     )
     db.add(db_message)
+    db.execute(_touch_chat(chat_id, 1))
+    db.execute(_bump_chats_version(_chat_owner(chat_id)))
     db.commit()
     db.refresh(db_message)
     return db_message
 
-def get_chat_messages(db: Session, chat_id: int, user_id: int) -> List[Message]:
-    chat = get_chat(db, chat_id, user_id)
-    if not chat:
-        return []
-    return chat.messages
+def _chat_messages_page(
+    chat_id: int,
+    user_id: int,
+    before_id: Optional[int],
+    after_id: Optional[int],
+    limit: int,
+    columns: Tuple[Any, ...] = (Message,)
+):
+    """
+    Запрос страницы сообщений по индексу (chat_id, id); владелец чата проверяется в том же запросе.
+    С after_id страница идет вперед от курсора, иначе — назад от before_id (или от конца истории)
+    """
+    stmt = (
+        select(*columns)
+        .join(Chat, Chat.id == Message.chat_id)
+        .where(Message.chat_id == chat_id, Chat.user_id == user_id)
+    )
+    if before_id is not None:
+        stmt = stmt.where(Message.id < before_id)
+    if after_id is not None:
+        return stmt.where(Message.id > after_id).order_by(Message.id.asc()).limit(limit), False
+    return stmt.order_by(Message.id.desc()).limit(limit), True
+
+def get_chat_messages(
+    db: Session,
+    chat_id: int,
+    user_id: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Message]:
+    stmt, reverse = _chat_messages_page(chat_id, user_id, before_id, after_id, limit)
+    messages = list(db.scalars(stmt).all())
+    # Сообщения всегда отдаются в хронологическом порядке
+    if reverse:
+        messages.reverse()
+    return messages
+
+def get_chat_message_rows(
+    db: Session,
+    chat_id: int,
+    user_id: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Row]:
+    """
+    Та же страница, что get_chat_messages, но строками MESSAGE_COLUMNS — для быстрой сериализации
+    """
+    stmt, reverse = _chat_messages_page(chat_id, user_id, before_id, after_id, limit, MESSAGE_COLUMNS)
+    rows = list(db.execute(stmt).all())
+    if reverse:
+        rows.reverse()
+    return rows
+
+def get_message_rows_by_chat(
+    db: Session,
+    chat_ids: List[int],
+    per_chat_limit: Optional[int] = None
+) -> Dict[int, List[Row]]:
+    """
+    Сообщения нескольких чатов одним запросом (вместо ленивой загрузки chat.messages
+    по чату), сгруппированные по chat_id в хронологическом порядке.
+    per_chat_limit оставляет только последние сообщения каждого чата
+    """
+    grouped: Dict[int, List[Row]] = {chat_id: [] for chat_id in chat_ids}
+    if not chat_ids:
+        return grouped
+    if per_chat_limit is None:
+        rows = db.execute(
+            select(*MESSAGE_COLUMNS)
+            .where(Message.chat_id.in_(chat_ids))
+            .order_by(Message.chat_id, Message.id)
+        )
+    else:
+        # Номер сообщения с конца чата: оконная функция по индексу (chat_id, id)
+        position = func.row_number().over(partition_by=Message.chat_id, order_by=Message.id.desc())
+        ranked = (
+            select(*MESSAGE_COLUMNS, position.label("position"))
+            .where(Message.chat_id.in_(chat_ids))
+            .subquery()
+        )
+        rows = db.execute(
+            select(*(ranked.c[column.key] for column in MESSAGE_COLUMNS))
+            .where(ranked.c.position <= per_chat_limit)
+            .order_by(ranked.c.chat_id, ranked.c.id)
+        )
+    for row in rows:
+        grouped[row.chat_id].append(row)
+    return grouped
 
 def get_favorite_books(db: Session, user_id: int) -> List[FavoriteBook]:
     return db.query(FavoriteBook).filter(FavoriteBook.user_id == user_id).all()
 
+def get_favorites_version(db: Session, user_id: int) -> int:
+    return db.scalar(select(User.favorites_version).where(User.id == user_id)) or 0
+
+def _bump_favorites_version(user_id: int):
+    # updated_at профиля не меняется: избранное — не часть профиля
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(favorites_version=User.favorites_version + 1, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+# Книг в одном INSERT: 5 параметров на книгу, укладываемся в лимит переменных старых SQLite (999)
+FAVORITES_UPSERT_CHUNK = 150
+
+def _favorite_rows(user_id: int, books: Iterable[dict]) -> List[dict]:
+    # Дубли внутри одного запроса схлопываются (побеждает последний): ON CONFLICT
+    # не может обновить одну строку дважды в одном INSERT
+    rows: Dict[str, dict] = {}
+    for book in books:
+        rows[book["id"]] = {
+            "user_id": user_id,
+            "book_id": book["id"],
+            "title": book["title"],
+            "author": book.get("author"),
+            "cover_url": book.get("cover_url")
+        }
+    return list(rows.values())
+
+def _favorites_upsert(dialect_name: str, rows: List[dict]):
+    """
+    INSERT ... ON CONFLICT (user_id, book_id) DO UPDATE: книга, уже бывшая в избранном,
+    получает свежие название, автора и обложку, added_at сохраняется
+    """
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert(FavoriteBook).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[FavoriteBook.user_id, FavoriteBook.book_id],
+        set_={
+            "title": stmt.excluded.title,
+            "author": stmt.excluded.author,
+            "cover_url": stmt.excluded.cover_url
+        }
+    )
+
+def _count_existing_favorites(user_id: int, rows: List[dict]):
+    return select(func.count(FavoriteBook.id)).where(
+        FavoriteBook.user_id == user_id,
+        FavoriteBook.book_id.in_([row["book_id"] for row in rows])
+    )
+
+def upsert_favorite_books(db: Session, user_id: int, books: Iterable[dict]) -> Dict[str, int]:
+    """
+    Добавляет книги в избранное пачками INSERT ... ON CONFLICT в одной транзакции.
+    Возвращает число принятых, новых и обновленных книг
+    """
+    books = list(books)
+    rows = _favorite_rows(user_id, books)
+    existing = 0
+    dialect_name = db.get_bind().dialect.name
+    for start in range(0, len(rows), FAVORITES_UPSERT_CHUNK):
+        chunk = rows[start:start + FAVORITES_UPSERT_CHUNK]
+        existing += db.scalar(_count_existing_favorites(user_id, chunk))
+        db.execute(_favorites_upsert(dialect_name, chunk))
+    if rows:
+        db.execute(_bump_favorites_version(user_id))
+        db.commit()
+    return {"received": len(books), "inserted": len(rows) - existing, "updated": existing}
+
 def add_favorite_book(db: Session, user_id: int, book_data: dict) -> FavoriteBook:
-    db_book = FavoriteBook(
-        user_id=user_id,
-        book_id=book_data["id"],
-        title=book_data["title"],
-        author=book_data.get("author"),
-        cover_url=book_data.get("cover_url")
+    # Повторное добавление той же книги обновляет запись, а не плодит дубль
+    upsert_favorite_books(db, user_id, [book_data])
+    return db.query(FavoriteBook).filter(
+        FavoriteBook.user_id == user_id,
+        FavoriteBook.book_id == book_data["id"]
+    ).populate_existing().one()
+
+def _delete_favorite(user_id: int, book_id: str):
+    return (
+        delete(FavoriteBook)
+        .where(FavoriteBook.user_id == user_id, FavoriteBook.book_id == book_id)
+        .execution_options(synchronize_session=False)
     )
-    db.add(db_book)
-    db.commit()
-    db.refresh(db_book)
-    return db_book
 
 def remove_favorite_book(db: Session, user_id: int, book_id: str) -> bool:
-    db_book = db.query(FavoriteBook).filter(
-        FavoriteBook.user_id == user_id,
-        FavoriteBook.book_id == book_id
-    ).first()
+    result = db.execute(_delete_favorite(user_id, book_id))
+    if result.rowcount == 0:
+        return False
+
+    db.execute(_bump_favorites_version(user_id))
+    db.commit()
+    return True
+
+def iter_favorite_book_batches(db: Session, user_id: int, batch_size: int = 500) -> Iterator[List[Row]]:
+    """
+    Избранное пользователя порциями по batch_size строк — для потокового экспорта
+    без загрузки всего списка в память
+    """
+    result = db.execute(
+        select(
+            FavoriteBook.book_id,
+            FavoriteBook.title,
+            FavoriteBook.author,
+            FavoriteBook.cover_url,
+            FavoriteBook.added_at
+        )
+        .where(FavoriteBook.user_id == user_id)
+        .order_by(FavoriteBook.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        yield list(partition)
+
+def get_favorite_book_ids(db: Session, user_id: int) -> List[str]:
+    return list(db.scalars(select(FavoriteBook.book_id).where(FavoriteBook.user_id == user_id)))
+
+def get_favorites_signature(db: Session) -> Tuple[int, int]:
+    """
+    (сумма users.favorites_version, количество пользователей) — дешевая проверка, менялось ли избранное.
+    Любая запись увеличивает счетчик версий: в отличие от (count, max id) видны и обновления
+    на месте, и удаление с повторным использованием rowid. Количество пользователей учитывает
+    удаление пользователя, уменьшающее сумму
+    """
+    total, users = db.execute(
+        select(func.coalesce(func.sum(User.favorites_version), 0), func.count(User.id))
+    ).one()
+    return int(total), users
+
+def get_all_favorites(db: Session) -> List[Tuple[int, str, str, Optional[str], Optional[str]]]:
+    """
+    Все пары пользователь-книга для построения модели рекомендаций
+    """
+    rows = db.execute(
+        select(
+            FavoriteBook.user_id,
+            FavoriteBook.book_id,
+            FavoriteBook.title,
+            FavoriteBook.author,
+            FavoriteBook.cover_url
+        ).order_by(FavoriteBook.id)
+    )
+    return [tuple(row) for row in rows]
+
+# Асинхронные версии для async-эндпоинтов
+
+async def get_chat_async(db: AsyncSession, chat_id: int, user_id: int) -> Optional[Chat]:
+    result = await db.execute(select(Chat).where(Chat.id == chat_id, Chat.user_id == user_id))
+    return result.scalars().first()
+
+async def get_user_chats_async(db: AsyncSession, user_id: int, limit: int = 100, cursor: Optional[str] = None) -> List[Chat]:
+    stmt = select(Chat).where(Chat.user_id == user_id)
+    if cursor:
+        stmt = stmt.where(_chats_before(db.get_bind().dialect.name, cursor))
+    result = await db.execute(stmt.order_by(chat_activity.desc(), Chat.id.desc()).limit(limit))
+    return list(result.scalars().all())
+
+async def create_chat_async(db: AsyncSession, chat: ChatCreate, user_id: int) -> Chat:
+    db_chat = Chat(**chat.dict(), user_id=user_id)
+    db.add(db_chat)
+    await db.execute(_bump_chats_version(user_id))
+    await db.commit()
+    await db.refresh(db_chat)
+    return db_chat
+
+async def update_chat_async(db: AsyncSession, chat_id: int, user_id: int, title: str) -> Optional[Chat]:
+    db_chat = await get_chat_async(db, chat_id, user_id)
+    if not db_chat:
+        return None
     
-    if not db_book:
+    db_chat.title = title
+    db_chat.version = Chat.version + 1
+    await db.execute(_bump_chats_version(user_id))
+    await db.commit()
+    await db.refresh(db_chat)
+    return db_chat
+
+async def delete_chat_async(db: AsyncSession, chat_id: int, user_id: int) -> bool:
+    db_chat = await get_chat_async(db, chat_id, user_id)
+    if not db_chat:
         return False
     
-    db.delete(db_book)
-    db.commit()
-    return True
\ No newline at end of file
+    await db.delete(db_chat)
+    await db.execute(_bump_chats_version(user_id))
+    await db.commit()
+    return True
+
+async def create_message_async(db: AsyncSession, message: MessageCreate, chat_id: int) -> Message:
+    db_message = Message(
+        chat_id=chat_id,
+        content=message.content,
+        role=message.role,
+        meta=message.metadata
+    )
+    db.add(db_message)
+    await db.execute(_touch_chat(chat_id, 1))
+    await db.execute(_bump_chats_version(_chat_owner(chat_id)))
+    await db.commit()
+    await db.refresh(db_message)
+    return db_message
+
+async def save_chat_exchange_async(
+    db: AsyncSession,
+    user_id: int,
+    chat_id: Optional[int],
+    messages: List[MessageCreate]
+) -> int:
+    """
+    Единица работы для отправки сообщения: создает чат (если chat_id не задан),
+    добавляет сообщения, обновляет message_count, updated_at и заголовок по первому
+    сообщению пользователя — все в одной транзакции. Возвращает id чата.
+    Владение чатом должен проверить вызывающий код
+    """
+    first_user_message = next((m.content for m in messages if m.role == "user"), None)
+    title = _chat_title(first_user_message) if first_user_message is not None else None
+
+    if chat_id is None:
+        db_chat = Chat(
+            user_id=user_id,
+            title=title or DEFAULT_CHAT_TITLE,
+            message_count=len(messages)
+        )
+        db.add(db_chat)
+        await db.flush()
+        chat_id = db_chat.id
+    else:
+        await db.execute(_touch_chat(chat_id, len(messages), title))
+
+    db.add_all([
+        Message(
+            chat_id=chat_id,
+            content=message.content,
+            role=message.role,
+            meta=message.metadata
+        )
+        for message in messages
+    ])
+    await db.execute(_bump_chats_version(user_id))
+    await db.commit()
+    return chat_id
+
+async def get_chat_messages_async(
+    db: AsyncSession,
+    chat_id: int,
+    user_id: int,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Message]:
+    stmt, reverse = _chat_messages_page(chat_id, user_id, before_id, after_id, limit)
+    messages = list((await db.scalars(stmt)).all())
+    if reverse:
+        messages.reverse()
+    return messages
+
+async def get_chat_context_async(
+    db: AsyncSession,
+    chat_id: int,
+    limit: Optional[int] = None
+) -> Tuple[Optional[str], Optional[int], List[Message]]:
+    """
+    Данные для контекста OpenAI: summary чата и сообщения, еще не вошедшие в summary
+    (все или до limit последних, от новых к старым)
+    """
+    row = (await db.execute(
+        select(Chat.summary, Chat.summary_message_id).where(Chat.id == chat_id)
+    )).first()
+    if row is None:
+        return None, None, []
+    summary, summary_message_id = row
+
+    stmt = select(Message).where(Message.chat_id == chat_id)
+    if summary_message_id is not None:
+        stmt = stmt.where(Message.id > summary_message_id)
+    stmt = stmt.order_by(Message.id.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    messages = list((await db.scalars(stmt)).all())
+    return summary, summary_message_id, messages
+
+async def update_chat_summary_async(
+    db: AsyncSession,
+    chat_id: int,
+    summary: Optional[str],
+    summary_message_id: int,
+    previous_message_id: Optional[int]
+) -> bool:
+    """
+    Сохраняет новый summary, только если его не обновил параллельный запрос.
+    updated_at не меняется: это не активность пользователя
+    """
+    result = await db.execute(
+        update(Chat)
+        .where(
+            Chat.id == chat_id,
+            func.coalesce(Chat.summary_message_id, 0) == (previous_message_id or 0)
+        )
+        .values(
+            summary=summary,
+            summary_message_id=summary_message_id,
+            updated_at=Chat.updated_at
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+async def get_favorite_books_async(db: AsyncSession, user_id: int) -> List[FavoriteBook]:
+    result = await db.execute(select(FavoriteBook).where(FavoriteBook.user_id == user_id))
+    return list(result.scalars().all())
+
+async def add_favorite_book_async(db: AsyncSession, user_id: int, book_data: dict) -> FavoriteBook:
+    rows = _favorite_rows(user_id, [book_data])
+    await db.execute(_favorites_upsert(db.get_bind().dialect.name, rows))
+    await db.execute(_bump_favorites_version(user_id))
+    await db.commit()
+    # populate_existing: объект мог остаться в сессии со старыми полями
+    result = await db.execute(
+        select(FavoriteBook)
+        .where(FavoriteBook.user_id == user_id, FavoriteBook.book_id == book_data["id"])
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().one()
+
+async def remove_favorite_book_async(db: AsyncSession, user_id: int, book_id: str) -> bool:
+    result = await db.execute(_delete_favorite(user_id, book_id))
+    if result.rowcount == 0:
+        return False
+
+    await db.execute(_bump_favorites_version(user_id))
+    await db.commit()
+    return True
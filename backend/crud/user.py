@@ -1,8 +1,16 @@
+from sqlalchemy import select, event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from models.user import User
 from schemas.user import UserCreate, UserUpdate
-from core.security import get_password_hash
+from core.security import get_password_hash, get_password_hash_async
+from core.principal_cache import principal_cache
+
+@event.listens_for(User, "after_update")
+def _invalidate_principal(mapper, connection, target):
+    # Любое изменение пользователя (в т.ч. is_active) сбрасывает кэш его токенов
+    principal_cache.invalidate_user(target.username)
 
 def get_user(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
@@ -40,5 +48,57 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
         setattr(db_user, field, value)
     
     db.commit()
+    # Повторная инвалидация после коммита: между flush и commit могли закэшировать старые данные
+    principal_cache.invalidate_user(db_user.username)
     db.refresh(db_user)
+    return db_user
+
+# Асинхронные версии для async-эндпоинтов
+
+async def get_user_async(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
+async def get_user_by_username_async(db: AsyncSession, username: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+async def create_user_async(db: AsyncSession, user: UserCreate) -> User:
+    # bcrypt выполняется в отдельном пуле
+    hashed_password = await get_password_hash_async(user.password)
+    db_user = User(
+        username=user.username,
+        email=user.email,
+        hashed_password=hashed_password,
+        full_name=user.full_name
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user_async(db: AsyncSession, user_id: int, user_update: UserUpdate) -> Optional[User]:
+    db_user = await get_user_async(db, user_id)
+    if not db_user:
+        return None
+    
+    update_data = user_update.dict(exclude_unset=True)
+    
+    if "password" in update_data:
+        update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
+    
+    for field, value in update_data.items():
+        setattr(db_user, field, value)
+    
+    await db.commit()
+    principal_cache.invalidate_user(db_user.username)
+    await db.refresh(db_user)
+    return db_user
+
+async def update_password_hash_async(db: AsyncSession, db_user: User, hashed_password: str) -> User:
+    db_user.hashed_password = hashed_password
+    await db.commit()
     return db_user
\ No newline at end of file
@@ -1,4 +1,5 @@
 from .user import User
 from .chat import Chat, Message
+from .book import CatalogBook
 
-__all__ = ["User", "Chat", "Message"]
\ No newline at end of file
+__all__ = ["User", "Chat", "Message", "CatalogBook"]
\ No newline at end of file
@@ -0,0 +1,59 @@
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, DDL, event
+from sqlalchemy.sql import func
+from core.database import Base
+
+class CatalogBook(Base):
+    __tablename__ = "book_catalog"
+
+    id = Column(Integer, primary_key=True, index=True)
+    book_id = Column(String, unique=True, index=True, nullable=False)  # ID книги из внешнего API
+    title = Column(String, nullable=False)
+    author = Column(String, nullable=True)
+    genre = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    rating = Column(Float, nullable=True)
+    page_count = Column(Integer, nullable=True)
+    cover_url = Column(String, nullable=True)
+    preview_link = Column(String, nullable=True)
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # Растет при каждом изменении книги (сигнатура индекса)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CatalogBook(id={self.id}, title={self.title})>"
+
+# Полнотекстовый индекс FTS5 (только SQLite), синхронизируется триггерами
+_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS book_catalog_fts USING fts5(
+        title, author, genre, description,
+        content='book_catalog', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_catalog_ai AFTER INSERT ON book_catalog BEGIN
+        INSERT INTO book_catalog_fts(rowid, title, author, genre, description)
+        VALUES (new.id, new.title, new.author, new.genre, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_catalog_ad AFTER DELETE ON book_catalog BEGIN
+        INSERT INTO book_catalog_fts(book_catalog_fts, rowid, title, author, genre, description)
+        VALUES ('delete', old.id, old.title, old.author, old.genre, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_catalog_au AFTER UPDATE ON book_catalog BEGIN
+        INSERT INTO book_catalog_fts(book_catalog_fts, rowid, title, author, genre, description)
+        VALUES ('delete', old.id, old.title, old.author, old.genre, old.description);
+        INSERT INTO book_catalog_fts(rowid, title, author, genre, description)
+        VALUES (new.id, new.title, new.author, new.genre, new.description);
+    END
+    """,
+]
+
+for _statement in _FTS_DDL:
+    event.listen(
+        CatalogBook.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite")
+    )
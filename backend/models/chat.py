@@ -1,27 +1,56 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, JSON, DateTime, Index
 from datetime import datetime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects import sqlite
 from core.database import Base
 
+# В SQLite даты чатов пишутся в формате CURRENT_TIMESTAMP (без долей секунды), как и server_default/onupdate:
+# keyset-пагинация сравнивает их строками, и смешанные форматы ломали бы порядок
+ChatTimestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
 class Chat(Base):
     __tablename__ = "chats"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")  # Денормализованный счетчик
+    summary = Column(Text, nullable=True)  # Сжатый пересказ старых сообщений для контекста OpenAI
+    summary_message_id = Column(Integer, nullable=True)  # Последнее сообщение, вошедшее в summary
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # Растет при каждом изменении чата (ETag)
+    created_at = Column(ChatTimestamp, server_default=func.now())
+    updated_at = Column(ChatTimestamp, onupdate=func.now())
     
     # Связи
     user = relationship("User", back_populates="chats")
-    messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan")
+    messages = relationship(
+        "Message",
+        back_populates="chat",
+        cascade="all, delete-orphan",
+        order_by="Message.id"
+    )
     
     def __repr__(self):
         return f"<Chat(id={self.id}, title={self.title})>"
 
+# Индекс под keyset-пагинацию списка чатов по (активность, id)
+Index(
+    "ix_chats_user_activity",
+    Chat.user_id,
+    func.coalesce(Chat.updated_at, Chat.created_at),
+    Chat.id
+)
+
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Постраничная загрузка истории чата: WHERE chat_id = ? AND id < ? ORDER BY id DESC
+        Index("ix_messages_chat_id_id", "chat_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False)
@@ -48,6 +77,11 @@ class FavoriteBook(Base):
     
     # Связи
     user = relationship("User", back_populates="favorite_books")
+
+    __table_args__ = (
+        # Одна книга — одна запись в избранном пользователя; цель ON CONFLICT при upsert
+        Index("ux_favorite_books_user_book", "user_id", "book_id", unique=True),
+    )
     
     def __repr__(self):
         return f"<FavoriteBook(id={self.id}, title={self.title})>"
\ No newline at end of file
@@ -12,6 +12,8 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     full_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    favorites_version = Column(Integer, nullable=False, default=0, server_default="0")  # Растет при каждом изменении избранного (ETag)
+    chats_version = Column(Integer, nullable=False, default=0, server_default="0")  # Растет при каждом изменении чатов (ETag)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -1,7 +1,12 @@
-from .user import UserCreate, UserUpdate, UserInDB, UserResponse
-from .chat import ChatCreate, ChatResponse, MessageCreate, MessageResponse
+from .user import (
+    UserCreate, UserUpdate, UserInDB, UserResponse, BookRecommendation,
+    FavoriteBookIn, FavoritesBulkRequest, FavoritesBulkResult
+)
+from .chat import ChatCreate, ChatResponse, MessageCreate, MessageResponse, ChatSummary, ChatSummaryPage
 
 __all__ = [
-    "UserCreate", "UserUpdate", "UserInDB", "UserResponse",
-    "ChatCreate", "ChatResponse", "MessageCreate", "MessageResponse"
+    "UserCreate", "UserUpdate", "UserInDB", "UserResponse", "BookRecommendation",
+    "FavoriteBookIn", "FavoritesBulkRequest", "FavoritesBulkResult",
+    "ChatCreate", "ChatResponse", "MessageCreate", "MessageResponse",
+    "ChatSummary", "ChatSummaryPage"
 ]
\ No newline at end of file
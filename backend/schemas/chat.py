@@ -41,11 +41,58 @@ class ChatResponse(ChatBase):
     class Config:
         from_attributes = True
 
+class ChatSummary(BaseModel):
+    id: int
+    title: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    message_count: int = 0
+    last_message: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class ChatSummaryPage(BaseModel):
+    items: List[ChatSummary]
+    next_cursor: Optional[str] = None
+
 class ChatRequest(BaseModel):
     message: str
     chat_id: Optional[int] = None
+    use_cache: bool = True  # False — ответ OpenAI генерируется заново, в обход кэша
 
 class ChatResponseData(BaseModel):
     response: str
     recommendations: Optional[List[Dict[str, Any]]] = None
-    chat_id: Optional[int] = None
\ No newline at end of file
+    chat_id: Optional[int] = None
+# Быстрая сериализация доверенных данных из БД без валидации pydantic.
+# Ключи и порядок полей совпадают с MessageResponse/ChatResponse/ChatSummary (by_alias)
+
+def message_to_dict(message: Any) -> Dict[str, Any]:
+    return {
+        "id": message.id,
+        "chat_id": message.chat_id,
+        "content": message.content,
+        "role": message.role,
+        "meta": message.meta
+    }
+
+def chat_to_dict(chat: Any, messages: List[Any]) -> Dict[str, Any]:
+    return {
+        "title": chat.title,
+        "id": chat.id,
+        "user_id": chat.user_id,
+        "messages": [message_to_dict(message) for message in messages],
+        "created_at": chat.created_at,
+        "updated_at": chat.updated_at
+    }
+
+def chat_summary_to_dict(row: Any) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "title": row.title,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "message_count": row.message_count,
+        "last_message": row.last_message
+    }
@@ -1,6 +1,9 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+# Книг в одном запросе массового импорта избранного
+FAVORITES_BULK_LIMIT = 1000
 
 class UserBase(BaseModel):
     username: str
@@ -27,6 +30,27 @@ class UserInDB(UserBase):
 class UserResponse(UserInDB):
     pass
 
+class BookRecommendation(BaseModel):
+    book_id: str
+    title: str
+    author: Optional[str] = None
+    cover_url: Optional[str] = None
+    score: float
+
+class FavoriteBookIn(BaseModel):
+    id: str = Field(..., min_length=1)  # ID книги из внешнего API
+    title: str
+    author: Optional[str] = None
+    cover_url: Optional[str] = None
+
+class FavoritesBulkRequest(BaseModel):
+    books: List[FavoriteBookIn] = Field(..., min_length=1, max_length=FAVORITES_BULK_LIMIT)
+
+class FavoritesBulkResult(BaseModel):
+    received: int
+    inserted: int
+    updated: int
+
 class Token(BaseModel):
     access_token: str
     token_type: str
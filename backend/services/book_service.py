@@ -1,53 +1,121 @@
 import httpx
 from typing import List, Dict, Any
 from config.settings import settings
+from core.cache import create_cache
+from core.http_client import GOOGLE_BOOKS, get_books_client
+from core.metrics import observe_upstream
+from core.resilience import check_upstream_status, get_upstream_guard
+from services.catalog_service import search_local_books, store_books
+
+class BookServiceError(Exception):
+    pass
+
+search_cache = create_cache(
+    "books:search",
+    max_size=settings.BOOK_CACHE_MAX_SIZE,
+    ttl=settings.BOOK_CACHE_TTL,
+    use_redis=settings.BOOK_CACHE_USE_REDIS
+)
+details_cache = create_cache(
+    "books:details",
+    max_size=settings.BOOK_CACHE_MAX_SIZE,
+    ttl=settings.BOOK_DETAILS_CACHE_TTL,
+    use_redis=settings.BOOK_CACHE_USE_REDIS
+)
+
+books_guard = get_upstream_guard(GOOGLE_BOOKS)
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Счетчики попаданий/промахов/вытеснений кэшей книг
+    """
+    return {
+        "search": search_cache.stats(),
+        "details": details_cache.stats()
+    }
+
+async def close_caches() -> None:
+    await search_cache.close()
+    await details_cache.close()
 
 async def search_books(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
     """
-    Ищет книги через Google Books API
+    Ищет книги сначала в локальном каталоге, затем через Google Books API (результаты кэшируются)
     """
+    key = f"{max_results}:{_normalize_query(query)}"
+    try:
+        return await search_cache.get_or_load(key, lambda: _search_books(query, max_results))
+    except Exception:
+        # Ошибки не кэшируются; при разомкнутой цепи ответ отдается сразу, без ожидания таймаута
+        return get_sample_books()
+
+async def _search_books(query: str, max_results: int) -> List[Dict[str, Any]]:
+    if settings.CATALOG_ENABLED:
+        try:
+            local_books = await search_local_books(query, max_results)
+        except Exception:
+            local_books = []
+        if len(local_books) >= min(settings.CATALOG_MIN_RESULTS, max_results):
+            return local_books
+    
     if not settings.GOOGLE_BOOKS_API_KEY:
         # Если нет API ключа, возвращаем тестовые данные
         return get_sample_books()
     
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://www.googleapis.com/books/v1/volumes",
-                params={
-                    "q": query,
-                    "maxResults": max_results,
-                    "key": settings.GOOGLE_BOOKS_API_KEY,
-                    "langRestrict": "ru"
-                },
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                books = []
-                
-                for item in data.get("items", []):
-                    volume_info = item.get("volumeInfo", {})
-                    book = {
-                        "id": item.get("id"),
-                        "title": volume_info.get("title", "Без названия"),
-                        "author": ", ".join(volume_info.get("authors", ["Неизвестный автор"])),
-                        "description": volume_info.get("description", ""),
-                        "genre": ", ".join(volume_info.get("categories", [])),
-                        "rating": volume_info.get("averageRating", 0),
-                        "page_count": volume_info.get("pageCount"),
-                        "cover_url": volume_info.get("imageLinks", {}).get("thumbnail", ""),
-                        "preview_link": volume_info.get("previewLink", "")
-                    }
-                    books.append(book)
-                
-                return books
-            else:
-                return get_sample_books()
+    books = await _fetch_books(query, max_results)
+    if settings.CATALOG_ENABLED:
+        try:
+            await store_books(books)
+        except Exception:
+            pass
+    return books
+
+async def _request_books_api(operation: str, path: str, params: Dict[str, Any]) -> httpx.Response:
+    """
+    GET к Google Books через bulkhead и circuit breaker
+    """
+    async with observe_upstream(GOOGLE_BOOKS, operation), books_guard:
+        response = await get_books_client().get(path, params=params)
+        check_upstream_status(GOOGLE_BOOKS, response.status_code)
+    return response
+
+async def _fetch_books(query: str, max_results: int) -> List[Dict[str, Any]]:
+    response = await _request_books_api(
+        "search_books",
+        "/volumes",
+        params={
+            "q": query,
+            "maxResults": max_results,
+            "key": settings.GOOGLE_BOOKS_API_KEY,
+            "langRestrict": "ru"
+        }
+    )
     
-    except Exception:
-        return get_sample_books()
+    if response.status_code != 200:
+        raise BookServiceError(f"Google Books вернул статус {response.status_code}")
+    
+    data = response.json()
+    books = []
+    
+    for item in data.get("items", []):
+        volume_info = item.get("volumeInfo", {})
+        book = {
+            "id": item.get("id"),
+            "title": volume_info.get("title", "Без названия"),
+            "author": ", ".join(volume_info.get("authors", ["Неизвестный автор"])),
+            "description": volume_info.get("description", ""),
+            "genre": ", ".join(volume_info.get("categories", [])),
+            "rating": volume_info.get("averageRating", 0),
+            "page_count": volume_info.get("pageCount"),
+            "cover_url": volume_info.get("imageLinks", {}).get("thumbnail", ""),
+            "preview_link": volume_info.get("previewLink", "")
+        }
+        books.append(book)
+    
+    return books
 
 def get_sample_books() -> List[Dict[str, Any]]:
     """
@@ -88,7 +156,7 @@ def get_sample_books() -> List[Dict[str, Any]]:
 
 async def get_book_details(book_id: str) -> Dict[str, Any]:
     """
-    Получает детальную информацию о книге
+    Получает детальную информацию о книге (результаты кэшируются)
     """
     if not settings.GOOGLE_BOOKS_API_KEY:
         # Возвращаем тестовые данные
@@ -98,36 +166,46 @@ async def get_book_details(book_id: str) -> Dict[str, Any]:
         return {}
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://www.googleapis.com/books/v1/volumes/{book_id}",
-                params={"key": settings.GOOGLE_BOOKS_API_KEY},
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                volume_info = data.get("volumeInfo", {})
-                
-                return {
-                    "id": data.get("id"),
-                    "title": volume_info.get("title", "Без названия"),
-                    "author": ", ".join(volume_info.get("authors", ["Неизвестный автор"])),
-                    "description": volume_info.get("description", ""),
-                    "genre": ", ".join(volume_info.get("categories", [])),
-                    "rating": volume_info.get("averageRating", 0),
-                    "rating_count": volume_info.get("ratingsCount", 0),
-                    "page_count": volume_info.get("pageCount"),
-                    "language": volume_info.get("language", "ru"),
-                    "published_date": volume_info.get("publishedDate", ""),
-                    "publisher": volume_info.get("publisher", ""),
-                    "isbn": volume_info.get("industryIdentifiers", [{}])[0].get("identifier", ""),
-                    "cover_url": volume_info.get("imageLinks", {}).get("thumbnail", ""),
-                    "preview_link": volume_info.get("previewLink", ""),
-                    "buy_link": volume_info.get("saleInfo", {}).get("buyLink", "")
-                }
-            else:
-                return {}
-    
+        return await details_cache.get_or_load(book_id, lambda: _load_book_details(book_id))
     except Exception:
-        return {}
\ No newline at end of file
+        return {}
+
+async def _load_book_details(book_id: str) -> Dict[str, Any]:
+    book = await _fetch_book_details(book_id)
+    if settings.CATALOG_ENABLED:
+        try:
+            await store_books([book])
+        except Exception:
+            pass
+    return book
+
+async def _fetch_book_details(book_id: str) -> Dict[str, Any]:
+    response = await _request_books_api(
+        "get_book_details",
+        f"/volumes/{book_id}",
+        params={"key": settings.GOOGLE_BOOKS_API_KEY}
+    )
+    
+    if response.status_code != 200:
+        raise BookServiceError(f"Google Books вернул статус {response.status_code}")
+    
+    data = response.json()
+    volume_info = data.get("volumeInfo", {})
+    
+    return {
+        "id": data.get("id"),
+        "title": volume_info.get("title", "Без названия"),
+        "author": ", ".join(volume_info.get("authors", ["Неизвестный автор"])),
+        "description": volume_info.get("description", ""),
+        "genre": ", ".join(volume_info.get("categories", [])),
+        "rating": volume_info.get("averageRating", 0),
+        "rating_count": volume_info.get("ratingsCount", 0),
+        "page_count": volume_info.get("pageCount"),
+        "language": volume_info.get("language", "ru"),
+        "published_date": volume_info.get("publishedDate", ""),
+        "publisher": volume_info.get("publisher", ""),
+        "isbn": volume_info.get("industryIdentifiers", [{}])[0].get("identifier", ""),
+        "cover_url": volume_info.get("imageLinks", {}).get("thumbnail", ""),
+        "preview_link": volume_info.get("previewLink", ""),
+        "buy_link": volume_info.get("saleInfo", {}).get("buyLink", "")
+    }
\ No newline at end of file
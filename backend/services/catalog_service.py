@@ -0,0 +1,115 @@
+import asyncio
+import csv
+import json
+from typing import List, Dict, Any, Iterable, Iterator
+from core.database import SessionLocal
+from crud.catalog import search_catalog, upsert_catalog_books
+from utils.helpers import extract_keywords
+
+# Служебные слова запросов к боту, которые не несут смысла для поиска по каталогу
+_QUERY_STOP_PREFIXES = (
+    "книг", "прочита", "рекоменд", "посовет", "автор", "жанр", "литератур",
+    "похож", "интерес", "хочу", "как", "что", "про", "для", "это", "чем"
+)
+
+_NUMERIC_FIELDS = {"rating": float, "page_count": int}
+
+def catalog_terms(query: str) -> List[str]:
+    """
+    Извлекает из запроса слова для поиска по локальному каталогу
+    """
+    return [
+        word for word in extract_keywords(query)
+        if not word.startswith(_QUERY_STOP_PREFIXES)
+    ]
+
+def _search(terms: List[str], limit: int) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        return search_catalog(db, terms, limit=limit)
+    finally:
+        db.close()
+
+def _store(books: List[Dict[str, Any]]) -> int:
+    db = SessionLocal()
+    try:
+        return upsert_catalog_books(db, books)
+    finally:
+        db.close()
+
+async def search_local_books(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+    """
+    Ищет книги в локальном каталоге
+    """
+    terms = catalog_terms(query)
+    if not terms:
+        return []
+    return await asyncio.to_thread(_search, terms, max_results)
+
+async def store_books(books: List[Dict[str, Any]]) -> int:
+    """
+    Сохраняет книги, полученные из внешнего API, в локальный каталог
+    """
+    if not books:
+        return 0
+    return await asyncio.to_thread(_store, books)
+
+def _normalize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    book = {key: value for key, value in record.items() if value not in (None, "")}
+    for field, cast in _NUMERIC_FIELDS.items():
+        if field in book:
+            try:
+                book[field] = cast(book[field])
+            except (TypeError, ValueError):
+                book.pop(field)
+    return book
+
+def _read_records(path: str) -> Iterator[Dict[str, Any]]:
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+        return
+
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+    yield from data.get("items", []) if isinstance(data, dict) else data
+
+def ingest_records(records: Iterable[Dict[str, Any]], batch_size: int = 500) -> int:
+    """
+    Пакетно загружает книги в каталог
+    """
+    total = 0
+    batch = []
+    for record in records:
+        batch.append(_normalize_record(record))
+        if len(batch) >= batch_size:
+            total += _store(batch)
+            batch = []
+    if batch:
+        total += _store(batch)
+    return total
+
+def ingest_file(path: str, batch_size: int = 500) -> int:
+    """
+    Загружает дамп книг (JSON, JSONL или CSV) в каталог
+    """
+    return ingest_records(_read_records(path), batch_size=batch_size)
+
+if __name__ == "__main__":
+    import argparse
+    from core.database import engine, Base
+    import models  # noqa: F401  регистрация таблиц
+
+    parser = argparse.ArgumentParser(description="Загрузка дампа книг в локальный каталог")
+    parser.add_argument("path", help="Файл .json, .jsonl или .csv с полями id, title, author, genre, description")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    count = ingest_file(args.path, batch_size=args.batch_size)
+    print(f"Загружено книг: {count}")
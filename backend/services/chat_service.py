@@ -1,101 +1,312 @@
-import httpx
+import hashlib
 import json
-from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from config.settings import settings
+from core.cache import create_cache
+from core.http_client import OPENAI, get_openai_client
+from core.metrics import observe_upstream
+from core.resilience import UpstreamUnavailable, check_upstream_status, get_upstream_guard
 from services.book_service import search_books
+from services.context_service import build_chat_context
+
+SYSTEM_PROMPT = "Ты книжный помощник. Помогаешь пользователям находить книги, рекомендовать литературу, обсуждать авторов и жанры. Будь дружелюбным и полезным."
+
+SUMMARY_PROMPT = "Сожми диалог книжного помощника с пользователем в краткое резюме на русском языке. Сохрани интересы и предпочтения пользователя, упомянутые книги и авторов, принятые решения. Только резюме, без вступлений."
+
+ROLE_NAMES = {"user": "Пользователь", "assistant": "Помощник"}
+
+# Простая логика: если в сообщении есть ключевые слова, ищем книги
+BOOK_KEYWORDS = ["книг", "прочита", "рекоменд", "автор", "жанр", "литератур"]
+
+UNAVAILABLE_MESSAGE = "Сервис ответов временно недоступен. Пожалуйста, попробуйте позже."
+BAD_STATUS_MESSAGE = "Извините, возникла проблема с обработкой вашего запроса. Попробуйте еще раз."
+FAILURE_MESSAGE = "Не удалось обработать запрос. Пожалуйста, попробуйте позже."
+
+class ChatServiceError(Exception):
+    pass
+
+openai_guard = get_upstream_guard(OPENAI)
+
+# Кэш ответов OpenAI по точному совпадению нормализованного запроса
+llm_cache = create_cache(
+    "llm:responses",
+    max_size=settings.LLM_CACHE_MAX_SIZE,
+    ttl=settings.LLM_CACHE_TTL,
+    use_redis=settings.LLM_CACHE_USE_REDIS
+)
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def llm_cache_key(payload: Dict[str, Any]) -> str:
+    """
+    Ключ кэша: модель, параметры генерации и все сообщения (системный промпт, контекст,
+    вопрос) после нормализации регистра и пробелов. Флаг stream в ключ не входит
+    """
+    normalized = {key: value for key, value in payload.items() if key not in ("messages", "stream")}
+    normalized["messages"] = [
+        [message["role"], _normalize_text(message["content"])] for message in payload["messages"]
+    ]
+    raw = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _use_llm_cache(use_cache: bool) -> bool:
+    return use_cache and settings.LLM_CACHE_ENABLED
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    return llm_cache.stats()
+
+async def close_llm_cache() -> None:
+    await llm_cache.close()
+
+def is_book_request(user_message: str) -> bool:
+    return any(keyword in user_message.lower() for keyword in BOOK_KEYWORDS)
+
+async def recommend_books(user_message: str) -> Dict[str, Any]:
+    """
+    Ищет книги по запросу и формирует ответ с рекомендациями
+    """
+    books = await search_books(user_message)
+
+    # Генерируем ответ
+    if books:
+        response = f"Вот что я нашел по вашему запросу '{user_message}':\n"
+
+        for i, book in enumerate(books[:3], 1):
+            response += f"{i}. {book['title']} - {book.get('author', 'Неизвестный автор')}\n"
+
+        response += "\nМогу рассказать подробнее о любой из этих книг!"
+        return {
+            "response": response,
+            "recommendations": books[:5]
+        }
+    else:
+        return {
+            "response": f"К сожалению, я не нашел книг по запросу '{user_message}'. Попробуйте уточнить запрос.",
+            "recommendations": []
+        }
+
+def fallback_response(user_message: str) -> Dict[str, Any]:
+    return {
+        "response": f"Я получил ваше сообщение: '{user_message}'. Как книжный помощник, я могу помочь вам с рекомендациями книг, поиском авторов или обсуждением литературы. Что вас интересует?",
+        "recommendations": []
+    }
 
 async def process_chat_message(
-    db: Session,
+    db: AsyncSession,
     user_message: str,
-    chat_id: int,
-    user_id: int
+    chat_id: Optional[int],
+    user_id: int,
+    use_cache: bool = True
 ) -> Dict[str, Any]:
     """
-    Обрабатывает сообщение пользователя и возвращает ответ с рекомендациями
+    Обрабатывает сообщение пользователя и возвращает ответ с рекомендациями.
+    use_cache=False — запрос к OpenAI в обход кэша ответов
     """
-    
+
     # Здесь можно добавить логику анализа сообщения
     # Например, определить, хочет ли пользователь рекомендации книг
-    
-    # Простая логика: если в сообщении есть ключевые слова, ищем книги
-    book_keywords = ["книг", "прочита", "рекоменд", "автор", "жанр", "литератур"]
-    
-    if any(keyword in user_message.lower() for keyword in book_keywords):
-        # Ищем книги по запросу
-        books = await search_books(user_message)
-        
-        # Генерируем ответ
-        if books:
-            response = f"Вот что я нашел по вашему запросу '{user_message}':\n"
-
-            for i, book in enumerate(books[:3], 1):
-                response += f"{i}. {book['title']} - {book.get('author', 'Неизвестный автор')}\n"
-            
-            response += "\nМогу рассказать подробнее о любой из этих книг!"
-            return {
-                "response": response,
-                "recommendations": books[:5]
-            }
-        else:
-            return {
-                "response": f"К сожалению, я не нашел книг по запросу '{user_message}'. Попробуйте уточнить запрос.",
-                "recommendations": []
-            }
-    
+
+    if is_book_request(user_message):
+        return await recommend_books(user_message)
+
     # Если это не запрос о книгах, используем OpenAI OpenAI API
     if settings.OPENAI_API_KEY:
-        return await generate_openai_response(user_message)
-    
+        history = await build_chat_context(db, chat_id, user_message, summarize_conversation)
+        return await generate_openai_response(user_message, history, use_cache)
+
     # Запасной вариант
+    return fallback_response(user_message)
+
+async def stream_chat_message(
+    db: AsyncSession,
+    user_message: str,
+    chat_id: Optional[int],
+    user_id: int,
+    use_cache: bool = True
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Потоковый вариант process_chat_message.
+    Сначала отдает событие ("recommendations", [...]), затем фрагменты ответа ("token", "...")
+    """
+    if is_book_request(user_message):
+        response_data = await recommend_books(user_message)
+    elif settings.OPENAI_API_KEY:
+        yield "recommendations", []
+        history = await build_chat_context(db, chat_id, user_message, summarize_conversation)
+        async for token in stream_openai_response(user_message, history, use_cache):
+            yield "token", token
+        return
+    else:
+        response_data = fallback_response(user_message)
+
+    yield "recommendations", response_data["recommendations"]
+    yield "token", response_data["response"]
+
+def _openai_headers() -> Dict[str, str]:
     return {
-        "response": f"Я получил ваше сообщение: '{user_message}'. Как книжный помощник, я могу помочь вам с рекомендациями книг, поиском авторов или обсуждением литературы. Что вас интересует?",
-        "recommendations": []
+        "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
+        "Content-Type": "application/json"
     }
 
-async def generate_openai_response(message: str) -> Dict[str, Any]:
+def _openai_payload(
+    message: str,
+    history: Optional[List[Dict[str, Any]]] = None,
+    stream: bool = False
+) -> Dict[str, Any]:
+    payload = {
+        "model": "gpt-3.5-turbo",
+        "messages": [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            *(history or []),
+            {
+                "role": "user",
+                "content": message
+            }
+        ],
+        "temperature": 0.7,
+        "max_tokens": 500
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+async def summarize_conversation(summary: Optional[str], messages: List[Dict[str, str]]) -> Optional[str]:
     """
-    Генерирует ответ с помощью OpenAI API
+    Дополняет summary чата новыми сообщениями. None, если OpenAI недоступен
     """
+    if not settings.OPENAI_API_KEY:
+        return None
+
+    parts = []
+    if summary:
+        parts.append(f"Предыдущее резюме: {summary}")
+    parts.append("\n".join(
+        f"{ROLE_NAMES.get(m['role'], m['role'])}: {m['content']}" for m in messages
+    ))
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-                    "Content-Type": "application/json"
-                },
+        async with observe_upstream(OPENAI, "summarize_conversation"), openai_guard:
+            response = await get_openai_client().post(
+                "/chat/completions",
+                headers=_openai_headers(),
                 json={
                     "model": "gpt-3.5-turbo",
                     "messages": [
-                        {
-                            "role": "system",
-                            "content": "Ты книжный помощник. Помогаешь пользователям находить книги, рекомендовать литературу, обсуждать авторов и жанры. Будь дружелюбным и полезным."
-                        },
-                        {
-                            "role": "user",
-                            "content": message
-                        }
+                        {"role": "system", "content": SUMMARY_PROMPT},
+                        {"role": "user", "content": "\n\n".join(parts)}
                     ],
-                    "temperature": 0.7,
-                    "max_tokens": 500
-                },
-                timeout=30.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "response": data["choices"][0]["message"]["content"],
-                    "recommendations": []
-                }
-            else:
-                return {
-                    "response": "Извините, возникла проблема с обработкой вашего запроса. Попробуйте еще раз.",
-                    "recommendations": []
+                    "temperature": 0.3,
+                    "max_tokens": settings.CONTEXT_SUMMARY_MAX_TOKENS
                 }
+            )
+            check_upstream_status(OPENAI, response.status_code)
+        if response.status_code != 200:
+            return None
+        return response.json()["choices"][0]["message"]["content"].strip() or None
+    except Exception:
+        return None
+
+async def _complete_openai(payload: Dict[str, Any]) -> str:
+    async with observe_upstream(OPENAI, "generate_openai_response"), openai_guard:
+        response = await get_openai_client().post(
+            "/chat/completions",
+            headers=_openai_headers(),
+            json=payload
+        )
+        check_upstream_status(OPENAI, response.status_code)
+
+    if response.status_code != 200:
+        raise ChatServiceError(f"OpenAI вернул статус {response.status_code}")
+    return response.json()["choices"][0]["message"]["content"]
+
+async def generate_openai_response(
+    message: str,
+    history: Optional[List[Dict[str, Any]]] = None,
+    use_cache: bool = True
+) -> Dict[str, Any]:
+    """
+    Генерирует ответ с помощью OpenAI API (успешные ответы кэшируются)
+    """
+    payload = _openai_payload(message, history)
+    try:
+        if _use_llm_cache(use_cache):
+            content = await llm_cache.get_or_load(llm_cache_key(payload), lambda: _complete_openai(payload))
+        else:
+            content = await _complete_openai(payload)
+        return {
+            "response": content,
+            "recommendations": []
+        }
+    except UpstreamUnavailable:
+        return {
+            "response": UNAVAILABLE_MESSAGE,
+            "recommendations": []
+        }
+    except ChatServiceError:
+        return {
+            "response": BAD_STATUS_MESSAGE,
+            "recommendations": []
+        }
     except Exception:
         return {
-            "response": "Не удалось обработать запрос. Пожалуйста, попробуйте позже.",
+            "response": FAILURE_MESSAGE,
             "recommendations": []
-        }
\ No newline at end of file
+        }
+
+async def stream_openai_response(
+    message: str,
+    history: Optional[List[Dict[str, Any]]] = None,
+    use_cache: bool = True
+) -> AsyncIterator[str]:
+    """
+    Генерирует ответ с помощью OpenAI API в режиме stream=true, отдавая токены по мере поступления.
+    Ответ из кэша отдается одним фрагментом; полностью полученный ответ сохраняется в кэш
+    """
+    payload = _openai_payload(message, history, stream=True)
+    cache_key = llm_cache_key(payload) if _use_llm_cache(use_cache) else None
+    if cache_key is not None:
+        cached = await llm_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    try:
+        async with observe_upstream(OPENAI, "stream_openai_response"), openai_guard:
+            client = get_openai_client()
+            async with client.stream(
+                "POST",
+                "/chat/completions",
+                headers=_openai_headers(),
+                json=payload
+            ) as response:
+                check_upstream_status(OPENAI, response.status_code)
+                if response.status_code != 200:
+                    yield BAD_STATUS_MESSAGE
+                    return
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    token = chunk["choices"][0].get("delta", {}).get("content")
+                    if token:
+                        parts.append(token)
+                        yield token
+    except UpstreamUnavailable:
+        yield UNAVAILABLE_MESSAGE
+        return
+    except Exception:
+        if not parts:
+            yield FAILURE_MESSAGE
+        return
+
+    if cache_key is not None and parts:
+        await llm_cache.set(cache_key, "".join(parts))
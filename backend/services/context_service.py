@@ -0,0 +1,105 @@
+import math
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.settings import settings
+from crud.chat import get_chat_context_async, update_chat_summary_async
+from models.chat import Message
+
+# Примерная длина токена в символах, если tiktoken не установлен (кириллица дробится мельче латиницы)
+CHARS_PER_TOKEN = 3
+# Служебные токены на каждое сообщение в формате chat completions
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# summarize(старое summary, сообщения от старых к новым) -> новое summary или None
+Summarizer = Callable[[Optional[str], List[Dict[str, str]]], Awaitable[Optional[str]]]
+
+@lru_cache(maxsize=1)
+def _tiktoken_encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str) -> int:
+    encoding = _tiktoken_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+def _to_openai(message: Message) -> Dict[str, str]:
+    return {"role": message.role, "content": message.content}
+
+def summary_message(summary: str) -> Dict[str, str]:
+    return {"role": "system", "content": f"Краткое содержание предыдущей части диалога: {summary}"}
+
+def split_by_budget(history: List[Dict[str, str]], budget: int) -> int:
+    """
+    Возвращает индекс, с которого хвост history (от старых к новым) укладывается в budget токенов
+    """
+    used = 0
+    start = len(history)
+    while start > 0:
+        cost = message_tokens(history[start - 1])
+        if used + cost > budget:
+            break
+        used += cost
+        start -= 1
+    return start
+
+def context_load_limit(budget: int) -> int:
+    """
+    Предел загружаемых сообщений: каждое стоит не меньше MESSAGE_OVERHEAD_TOKENS + 1 токенов,
+    поэтому больше в бюджет не поместится. Лишнее сообщение гарантирует, что переполнение
+    будет замечено и граница summary сдвинется
+    """
+    return budget // (MESSAGE_OVERHEAD_TOKENS + 1) + 1
+
+async def build_chat_context(
+    db: AsyncSession,
+    chat_id: Optional[int],
+    user_message: str,
+    summarize: Summarizer
+) -> List[Dict[str, Any]]:
+    """
+    Собирает историю чата для запроса к OpenAI (без системного промпта и текущего сообщения).
+
+    Последние сообщения берутся, пока укладываются в CONTEXT_TOKEN_BUDGET. Когда история
+    выходит за бюджет, старые сообщения один раз сворачиваются в summary чата, причем
+    с запасом — до CONTEXT_FOLD_TARGET бюджета, чтобы не вызывать summarize на каждом запросе.
+    Если summarize недоступен, вышедшие за бюджет сообщения не попадают в контекст, а граница
+    summary все равно сдвигается за них. Поэтому после каждого запроса за границей остается
+    не больше, чем помещается в бюджет, а загрузка дополнительно ограничена context_load_limit
+    """
+    if chat_id is None:
+        return []
+
+    summary, summary_message_id, rows = await get_chat_context_async(
+        db, chat_id, limit=context_load_limit(settings.CONTEXT_TOKEN_BUDGET)
+    )
+    rows.reverse()
+    # Потоковый эндпоинт сохраняет сообщение пользователя до обработки
+    if rows and rows[-1].role == "user" and rows[-1].content == user_message:
+        rows.pop()
+
+    history = [_to_openai(row) for row in rows]
+    budget = settings.CONTEXT_TOKEN_BUDGET
+    if summary:
+        budget -= message_tokens(summary_message(summary))
+
+    start = split_by_budget(history, budget)
+    if start > 0:
+        fold_until = max(start, split_by_budget(history, int(budget * settings.CONTEXT_FOLD_TARGET)))
+        new_summary = await summarize(summary, history[:fold_until])
+        if new_summary:
+            summary, start = new_summary, fold_until
+        # Без нового summary граница тоже сдвигается: вышедшие за бюджет сообщения уже не попадают
+        # в контекст и иначе загружались бы на каждом запросе
+        await update_chat_summary_async(db, chat_id, summary, rows[start - 1].id, summary_message_id)
+
+    context = [summary_message(summary)] if summary else []
+    return context + history[start:]
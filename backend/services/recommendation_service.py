@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy.orm import Session
+from config.settings import settings
+from core.database import SessionLocal
+from crud.chat import get_all_favorites, get_favorite_book_ids, get_favorites_signature
+
+@dataclass(frozen=True)
+class CooccurrenceModel:
+    """
+    Item-item модель по избранному: косинусная близость книг по совместной встречаемости у пользователей.
+    Неизменяемая — после перестроения ссылка на модель подменяется целиком
+    """
+    book_ids: List[str]
+    index: Dict[str, int]
+    books: List[Dict[str, Any]]
+    similarity: sp.csr_matrix
+    popularity: np.ndarray
+    signature: Tuple[int, int]
+    built_at: float
+
+def build_model(rows: List[Tuple[int, str, str, Optional[str], Optional[str]]], signature: Tuple[int, int]) -> CooccurrenceModel:
+    book_ids: List[str] = []
+    index: Dict[str, int] = {}
+    books: List[Dict[str, Any]] = []
+    user_index: Dict[int, int] = {}
+    user_col = []
+    item_col = []
+
+    for user_id, book_id, title, author, cover_url in rows:
+        item = index.get(book_id)
+        if item is None:
+            item = index[book_id] = len(book_ids)
+            book_ids.append(book_id)
+            books.append({"book_id": book_id, "title": title, "author": author, "cover_url": cover_url})
+        user_col.append(user_index.setdefault(user_id, len(user_index)))
+        item_col.append(item)
+
+    # Матрица пользователь x книга; дубликаты в избранном схлопываются в 1
+    interactions = sp.csr_matrix(
+        (np.ones(len(item_col), dtype=np.float32), (user_col, item_col)),
+        shape=(len(user_index), len(book_ids))
+    )
+    interactions.data[:] = 1.0
+
+    cooccurrence = (interactions.T @ interactions).tocsr()
+    popularity = cooccurrence.diagonal().astype(np.float32)
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+
+    # Косинусная нормировка: c_ij / sqrt(n_i * n_j)
+    norm = sp.diags(1.0 / np.sqrt(np.maximum(popularity, 1.0)))
+    similarity = (norm @ cooccurrence @ norm).tocsr()
+
+    return CooccurrenceModel(
+        book_ids=book_ids,
+        index=index,
+        books=books,
+        similarity=similarity,
+        popularity=popularity,
+        signature=signature,
+        built_at=time.time()
+    )
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Индексы k наибольших положительных оценок по убыванию: argpartition за O(n), сортируется только хвост
+    """
+    candidates = np.flatnonzero(scores > 0)
+    if candidates.size > k:
+        candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def recommend(model: CooccurrenceModel, favorite_ids: List[str], limit: int) -> List[Dict[str, Any]]:
+    items = np.array([model.index[book_id] for book_id in favorite_ids if book_id in model.index], dtype=np.int64)
+
+    if items.size:
+        scores = np.asarray(model.similarity[items].sum(axis=0)).ravel()
+    else:
+        # Холодный старт: самые популярные книги
+        scores = model.popularity.copy()
+    # Книги, уже добавленные в избранное, не рекомендуем
+    scores[items] = 0
+
+    return [
+        {**model.books[i], "score": float(scores[i])}
+        for i in top_k(scores, limit)
+    ]
+
+class RecommendationEngine:
+    """
+    Держит последнюю модель и перестраивает ее в фоне, если изменилась таблица избранного
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.model: Optional[CooccurrenceModel] = None
+        self.builds = 0
+        self.last_build_seconds = 0.0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Перестраивает модель (синхронно, вызывать из потока). Возвращает True, если модель обновилась
+        """
+        with self._lock:
+            db = SessionLocal()
+            try:
+                signature = get_favorites_signature(db)
+                if not force and self.model is not None and self.model.signature == signature:
+                    return False
+                rows = get_all_favorites(db)
+            finally:
+                db.close()
+
+            started = time.perf_counter()
+            self.model = build_model(rows, signature)
+            self.last_build_seconds = time.perf_counter() - started
+            self.builds += 1
+            return True
+
+    def get_model(self) -> CooccurrenceModel:
+        if self.model is None:
+            self.refresh()
+        return self.model
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                # Ошибка построения не должна останавливать фоновое обновление
+                pass
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        model = self.model
+        return {
+            "books": len(model.book_ids) if model else 0,
+            "pairs": model.similarity.nnz if model else 0,
+            "built_at": model.built_at if model else None,
+            "builds": self.builds,
+            "last_build_seconds": self.last_build_seconds
+        }
+
+recommendation_engine = RecommendationEngine(refresh_interval=settings.RECOMMENDATIONS_REFRESH_INTERVAL)
+
+def get_user_recommendations(db: Session, user_id: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    Персональные рекомендации по избранному пользователя; текущее избранное читается из БД,
+    поэтому только что добавленные книги исключаются еще до перестроения модели
+    """
+    favorite_ids = get_favorite_book_ids(db, user_id)
+    return recommend(recommendation_engine.get_model(), favorite_ids, limit)
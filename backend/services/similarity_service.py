@@ -0,0 +1,282 @@
+import asyncio
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import scipy.sparse as sp
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка между процессами недоступна
+    fcntl = None
+from config.settings import settings
+from core.database import SessionLocal
+from crud.catalog import get_catalog_signature, get_catalog_texts
+from services.recommendation_service import top_k
+
+# Размер пространства признаков: слова хэшируются, словарь хранить не нужно
+N_FEATURES = 2 ** 18
+
+# Вес признаков из разных полей книги
+TITLE_WEIGHT = 2
+AUTHOR_WEIGHT = 2
+GENRE_WEIGHT = 3
+
+_WORD_RE = re.compile(r"[а-яёa-z0-9]{3,}")
+
+_MATRIX_FILES = ("data", "indices", "indptr")
+
+def _tokens(title: str, author: Optional[str], genre: Optional[str], description: Optional[str]) -> Counter:
+    counts: Counter = Counter()
+    for word in _WORD_RE.findall((description or "").lower()):
+        counts[word] += 1
+    for word in _WORD_RE.findall(title.lower()):
+        counts[word] += TITLE_WEIGHT
+    # Автор и жанры — целыми признаками, чтобы "Фантастика" в жанре не смешивалась со словом в описании
+    for name in (author or "").lower().split(","):
+        if name.strip():
+            counts["author:" + name.strip()] += AUTHOR_WEIGHT
+    for name in (genre or "").lower().split(","):
+        if name.strip():
+            counts["genre:" + name.strip()] += GENRE_WEIGHT
+    return counts
+
+def _feature(token: str) -> int:
+    return zlib.crc32(token.encode()) % N_FEATURES
+
+def build_tfidf(rows: List[Tuple[str, str, Optional[str], Optional[str], Optional[str]]]) -> Tuple[sp.csr_matrix, List[str]]:
+    """
+    Строки — книги, столбцы — хэши слов; веса (1 + log tf) * idf, строки нормированы по L2,
+    поэтому косинусная близость — просто скалярное произведение
+    """
+    book_ids = []
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for book_id, title, author, genre, description in rows:
+        features: Dict[int, float] = {}
+        for token, count in _tokens(title, author, genre, description).items():
+            feature = _feature(token)
+            features[feature] = features.get(feature, 0.0) + count
+        book_ids.append(book_id)
+        indices.extend(features)
+        data.extend(1.0 + math.log(count) for count in features.values())
+        indptr.append(len(indices))
+
+    matrix = sp.csr_matrix(
+        (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+        shape=(len(book_ids), N_FEATURES)
+    )
+    df = np.bincount(matrix.indices, minlength=N_FEATURES)
+    idf = np.log((1 + len(book_ids)) / (1 + df)).astype(np.float32) + 1
+    matrix.data *= idf[matrix.indices]
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = sp.diags((1 / norms).astype(np.float32)) @ matrix
+    return matrix.tocsr(), book_ids
+
+@dataclass(frozen=True)
+class LoadedIndex:
+    version: str
+    matrix: sp.csr_matrix
+    book_ids: List[str]
+    index: Dict[str, int]
+    signature: Optional[List[Any]]
+
+def save_index(path: str, matrix: sp.csr_matrix, book_ids: List[str], signature: Any) -> str:
+    """
+    Пишет индекс в новый каталог версии и атомарно переключает на него файл CURRENT.
+    Массивы CSR сохраняются в .npy, чтобы процессы открывали их через mmap без копирования
+    """
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(path, version)
+    os.makedirs(version_dir)
+    for name in _MATRIX_FILES:
+        np.save(os.path.join(version_dir, f"{name}.npy"), getattr(matrix, name))
+    with open(os.path.join(version_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"shape": list(matrix.shape), "book_ids": book_ids, "signature": signature}, f, ensure_ascii=False)
+
+    previous = _current_version(path)
+    tmp = os.path.join(path, f"CURRENT.{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(path, "CURRENT"))
+    if previous is not None:
+        _prune_versions(path, older_than=previous)
+    return version
+
+def _version_number(name: str) -> Optional[int]:
+    if not name.startswith("v") or not name[1:].isdigit():
+        return None
+    return int(name[1:])
+
+def _prune_versions(path: str, older_than: str) -> None:
+    # Предыдущая версия остается: ее могут держать через mmap процессы, еще не увидевшие
+    # переключения. Удаляются только более старые и недописанные прежними сборками
+    limit = _version_number(older_than)
+    if limit is None:
+        return
+    for name in os.listdir(path):
+        number = _version_number(name)
+        if number is not None and number < limit:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+@contextmanager
+def _index_lock(path: str):
+    """
+    Блокировка каталога индекса между процессами: сборку, переключение CURRENT
+    и очистку версий одновременно выполняет только один воркер
+    """
+    with open(os.path.join(path, ".lock"), "w") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def _current_version(path: str) -> Optional[str]:
+    try:
+        with open(os.path.join(path, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def load_index(path: str, version: str) -> LoadedIndex:
+    version_dir = os.path.join(path, version)
+    with open(os.path.join(version_dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    arrays = [np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r") for name in _MATRIX_FILES]
+    matrix = sp.csr_matrix(tuple(arrays), shape=tuple(meta["shape"]), copy=False)
+    book_ids = meta["book_ids"]
+    return LoadedIndex(
+        version=version,
+        matrix=matrix,
+        book_ids=book_ids,
+        index={book_id: i for i, book_id in enumerate(book_ids)},
+        signature=meta["signature"]
+    )
+
+class SimilarityIndex:
+    """
+    TF-IDF индекс каталога на диске. Любой процесс может перестроить индекс;
+    остальные подхватывают новую версию по файлу CURRENT
+    """
+
+    def __init__(self, path: str, refresh_interval: float, reload_check_interval: float):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.reload_check_interval = reload_check_interval
+        self.loaded: Optional[LoadedIndex] = None
+        self.builds = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self) -> Optional[LoadedIndex]:
+        now = time.monotonic()
+        if self.loaded is None or now - self._checked_at >= self.reload_check_interval:
+            self._checked_at = now
+            version = _current_version(self.path)
+            if version is not None and (self.loaded is None or self.loaded.version != version):
+                try:
+                    self.loaded = load_index(self.path, version)
+                except FileNotFoundError:
+                    # Версию удалили между чтением CURRENT и загрузкой — попробуем при следующей проверке
+                    self._checked_at = 0.0
+        return self.loaded
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Перестраивает индекс, если каталог изменился (синхронно, вызывать из потока)
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, _index_lock(self.path):
+            # Пока ждали блокировку, индекс мог перестроить другой воркер — перечитываем CURRENT
+            self._checked_at = 0.0
+            db = SessionLocal()
+            try:
+                signature = list(get_catalog_signature(db))
+                loaded = self.get()
+                if not force and loaded is not None and loaded.signature == signature:
+                    return False
+                rows = get_catalog_texts(db)
+            finally:
+                db.close()
+
+            matrix, book_ids = build_tfidf(rows)
+            version = save_index(self.path, matrix, book_ids, signature)
+            self.loaded = load_index(self.path, version)
+            self.builds += 1
+            return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                # Ошибка построения не должна останавливать фоновое обновление
+                pass
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        loaded = self.loaded
+        return {
+            "version": loaded.version if loaded else None,
+            "books": len(loaded.book_ids) if loaded else 0,
+            "nnz": loaded.matrix.nnz if loaded else 0,
+            "builds": self.builds
+        }
+
+similarity_index = SimilarityIndex(
+    settings.SIMILARITY_INDEX_DIR,
+    refresh_interval=settings.SIMILARITY_REFRESH_INTERVAL,
+    reload_check_interval=settings.SIMILARITY_RELOAD_CHECK_INTERVAL
+)
+
+def find_similar(book_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+    """
+    Ближайшие по косинусу книги каталога: (book_id, score). None, если книги нет в индексе
+    """
+    loaded = similarity_index.get()
+    if loaded is None:
+        return None
+    row = loaded.index.get(book_id)
+    if row is None:
+        return None
+
+    scores = (loaded.matrix @ loaded.matrix[row].T).toarray().ravel()
+    scores[row] = 0
+    return [(loaded.book_ids[i], float(scores[i])) for i in top_k(scores, limit)]
+
+if __name__ == "__main__":
+    from core.database import engine, Base
+    import models  # noqa: F401  регистрация таблиц
+
+    Base.metadata.create_all(bind=engine)
+    similarity_index.refresh(force=True)
+    print(f"Индекс похожих книг: {similarity_index.stats()}")
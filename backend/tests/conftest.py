@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+# Настройки читаются при импорте config.settings: окружение задается до импорта приложения,
+# чтобы тесты не трогали book_chat.db, Redis и настоящие внешние API
+_workdir = tempfile.mkdtemp(prefix="book-chat-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_workdir, 'test.db')}",
+    "SECRET_KEY": "test-secret",
+    "REDIS_URL": "",
+    "GOOGLE_BOOKS_API_KEY": "test-key",
+    "OPENAI_API_KEY": "test-key",
+    "CATALOG_ENABLED": "false",
+    "RATE_LIMIT_ENABLED": "false",
+    "SIMILARITY_INDEX_DIR": os.path.join(_workdir, "similarity_index"),
+})
+
+import itertools
+
+import pytest
+
+_user_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def schema():
+    # Та же последовательность, что и в lifespan приложения: create_all, затем миграции
+    import models  # noqa: F401 — регистрирует таблицы в Base.metadata
+    from core.database import Base, engine
+    from core.migrations import upgrade_schema
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    return engine
+
+
+@pytest.fixture
+def db(schema):
+    from core.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    # Каждый тест получает своего пользователя: общая тестовая БД не чистится между тестами
+    from models.user import User
+
+    n = next(_user_ids)
+    db_user = User(username=f"user{n}", email=f"user{n}@example.com", hashed_password="x")
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
+@pytest.fixture
+def client(schema):
+    from fastapi.testclient import TestClient
+    from app import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    n = next(_user_ids)
+    credentials = {"username": f"api{n}", "email": f"api{n}@example.com", "password": "secret-password"}
+    assert client.post("/api/v1/auth/register", json=credentials).status_code == 200
+    token = client.post(
+        "/api/v1/auth/token",
+        data={"username": credentials["username"], "password": credentials["password"]}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
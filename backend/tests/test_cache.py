@@ -0,0 +1,110 @@
+import asyncio
+import types
+
+import pytest
+
+from core import cache as cache_module
+from core.cache import TTLCache, TwoTierCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+def test_concurrent_callers_share_one_load():
+    async def scenario():
+        cache = TwoTierCache("test", max_size=16, ttl=60)
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await release.wait()
+            return {"value": 42}
+
+        callers = [asyncio.create_task(cache.get_or_load("key", loader)) for _ in range(5)]
+        await started.wait()
+        release.set()
+        results = await asyncio.gather(*callers)
+
+        assert calls == 1
+        assert results == [{"value": 42}] * 5
+        stats = cache.stats()
+        assert stats["loads"] == 1
+        assert stats["coalesced"] == 4
+        # Ожидание чужой загрузки не считается попаданием
+        assert stats["hits"] == 0
+        assert stats["inflight"] == 0
+
+        assert await cache.get_or_load("key", loader) == {"value": 42}
+        assert calls == 1
+        assert cache.stats()["hits"] == 1
+
+    asyncio.run(scenario())
+
+def test_cancelled_caller_does_not_cancel_other_waiters():
+    async def scenario():
+        cache = TwoTierCache("test", max_size=16, ttl=60)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def loader():
+            started.set()
+            await release.wait()
+            return "loaded"
+
+        leader = asyncio.create_task(cache.get_or_load("key", loader))
+        await started.wait()
+        followers = [asyncio.create_task(cache.get_or_load("key", loader)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+
+        assert await asyncio.gather(*followers) == ["loaded", "loaded"]
+        # Загрузка дошла до конца и попала в кэш
+        assert cache.local.get("key") == "loaded"
+
+    asyncio.run(scenario())
+
+def test_errors_are_not_cached():
+    async def scenario():
+        cache = TwoTierCache("test", max_size=16, ttl=60)
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            raise RuntimeError("upstream down")
+
+        async def working():
+            nonlocal calls
+            calls += 1
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("key", failing)
+        assert cache.stats()["inflight"] == 0
+        assert await cache.get_or_load("key", working) == "ok"
+        assert calls == 2
+
+    asyncio.run(scenario())
+
+def test_ttl_expiry(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    cache = TTLCache(max_size=4, ttl=10)
+
+    cache.set("key", "value")
+    clock.now += 9.9
+    assert cache.get("key") == "value"
+    clock.now += 0.2
+    assert cache.get("key", None) is None
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,15 @@
+from crud.catalog import get_catalog_signature, upsert_catalog_books
+
+
+def test_signature_tracks_changes_within_the_same_second(db):
+    book = {"id": "catalog-1", "title": "Пикник на обочине", "author": "Стругацкие"}
+    upsert_catalog_books(db, [book])
+    built = get_catalog_signature(db)
+
+    # Повтор без изменений не переписывает строку
+    upsert_catalog_books(db, [book])
+    assert get_catalog_signature(db) == built
+
+    # Изменение сразу после построения индекса — в ту же секунду
+    upsert_catalog_books(db, [{**book, "description": "Зона"}])
+    assert get_catalog_signature(db) != built
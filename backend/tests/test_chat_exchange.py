@@ -0,0 +1,50 @@
+import asyncio
+
+from core.database import AsyncSessionLocal, async_engine
+from crud.chat import DEFAULT_CHAT_TITLE, save_chat_exchange_async
+from models.chat import Chat, Message
+from schemas.chat import MessageCreate
+
+
+def _exchange(question):
+    return [
+        MessageCreate(content=question, role="user"),
+        MessageCreate(content=f"Ответ на «{question}»", role="assistant"),
+    ]
+
+
+def _save(user_id, chat_id, messages):
+    async def scenario():
+        try:
+            async with AsyncSessionLocal() as session:
+                return await save_chat_exchange_async(session, user_id, chat_id, messages)
+        finally:
+            # Пул aiosqlite привязан к циклу событий, а каждый asyncio.run создает новый
+            await async_engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+def _chat(db, chat_id):
+    db.expire_all()
+    chat = db.get(Chat, chat_id)
+    stored = db.query(Message).filter(Message.chat_id == chat_id).count()
+    return chat.title, chat.message_count, stored
+
+
+def test_title_is_set_by_the_first_exchange_only(db, user):
+    chat_id = _save(user.id, None, _exchange("Что почитать у Лема?"))
+    assert _save(user.id, chat_id, _exchange("А у Стругацких?")) == chat_id
+
+    assert _chat(db, chat_id) == ("Что почитать у Лема?...", 4, 4)
+
+
+def test_first_exchange_titles_an_empty_chat(db, user):
+    chat = Chat(user_id=user.id, title=DEFAULT_CHAT_TITLE)
+    db.add(chat)
+    db.commit()
+
+    _save(user.id, chat.id, _exchange("Посоветуй фантастику"))
+    _save(user.id, chat.id, _exchange("Что-нибудь короче"))
+
+    assert _chat(db, chat.id) == ("Посоветуй фантастику...", 4, 4)
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from crud.chat import get_user_chat_summaries, get_user_chats, get_chat_cursor
+from models.chat import Chat
+
+
+def _add_chats(db, user_id, stamps):
+    chats = []
+    for created_at, updated_at in stamps:
+        chat = Chat(user_id=user_id, title="chat", created_at=created_at, updated_at=updated_at)
+        db.add(chat)
+        chats.append(chat)
+    db.commit()
+    return [chat.id for chat in chats]
+
+
+def _walk_chats(db, user_id, limit):
+    ids, cursor = [], None
+    while True:
+        page = get_user_chats(db, user_id, limit=limit, cursor=cursor)
+        ids.extend(chat.id for chat in page)
+        if len(page) < limit:
+            return ids
+        cursor = get_chat_cursor(page[-1])
+
+
+def _walk_summaries(db, user_id, limit):
+    ids, cursor = [], None
+    while True:
+        rows, cursor = get_user_chat_summaries(db, user_id, limit=limit, cursor=cursor)
+        ids.extend(row.id for row in rows)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("stamp", [
+    datetime(2026, 1, 1, 10, 0, 0),
+    datetime(2026, 1, 1, 10, 0, 0, 500000),
+])
+def test_pagination_breaks_timestamp_ties_by_id(db, user, stamp):
+    # Формат даты, записанной из Python, должен совпадать с форматом курсора
+    ids = _add_chats(db, user.id, [(stamp, None)] * 5)
+    expected = sorted(ids, reverse=True)
+
+    assert _walk_chats(db, user.id, limit=2) == expected
+    assert _walk_summaries(db, user.id, limit=2) == expected
+
+
+def test_pagination_uses_created_at_when_updated_at_is_null(db, user):
+    older, touched, newer = _add_chats(db, user.id, [
+        (datetime(2026, 1, 1, 10, 0), None),
+        (datetime(2026, 1, 1, 9, 0), datetime(2026, 1, 1, 11, 0)),
+        (datetime(2026, 1, 1, 10, 30), None),
+    ])
+    expected = [touched, newer, older]
+
+    assert _walk_chats(db, user.id, limit=1) == expected
+    assert _walk_summaries(db, user.id, limit=1) == expected
+    assert _walk_summaries(db, user.id, limit=2) == expected
+
+
+def test_chat_detail_returns_latest_messages_and_pages_the_rest(client, auth_headers, db, monkeypatch):
+    from config.settings import settings
+    from models.chat import Message
+
+    monkeypatch.setattr(settings, "CHAT_LIST_MESSAGES_PER_CHAT", 5)
+    chat_id = client.post("/api/v1/chat/chats", json={"title": "История"}, headers=auth_headers).json()["id"]
+    messages = [Message(chat_id=chat_id, role="user", content=str(i)) for i in range(8)]
+    db.add_all(messages)
+    db.commit()
+    ids = [message.id for message in messages]
+
+    detail = client.get(f"/api/v1/chat/chats/{chat_id}", headers=auth_headers).json()
+    assert [message["id"] for message in detail["messages"]] == ids[3:]
+
+    earlier = client.get(
+        f"/api/v1/chat/chats/{chat_id}/messages",
+        params={"before_id": ids[3]},
+        headers=auth_headers
+    ).json()
+    assert [message["id"] for message in earlier] == ids[:3]
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from core.database import AsyncSessionLocal, async_engine
+from models.chat import Chat, Message
+from services import context_service
+from services.context_service import build_chat_context, summary_message
+
+# 30 символов — 14 токенов с учетом служебных: в бюджет 100 помещается 7 сообщений
+CONTENT = "x" * 30
+
+
+@pytest.fixture(autouse=True)
+def small_budget(monkeypatch):
+    monkeypatch.setattr(settings, "CONTEXT_TOKEN_BUDGET", 100)
+    monkeypatch.setattr(settings, "CONTEXT_FOLD_TARGET", 0.5)
+
+
+def _make_chat(db, user, count, content=CONTENT):
+    chat = Chat(user_id=user.id, title="chat")
+    db.add(chat)
+    db.flush()
+    messages = [
+        Message(chat_id=chat.id, role="user" if i % 2 == 0 else "assistant", content=content)
+        for i in range(count)
+    ]
+    db.add_all(messages)
+    db.commit()
+    return chat.id, [message.id for message in messages]
+
+
+class Summarizer:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    async def __call__(self, summary, messages):
+        self.calls.append((summary, messages))
+        return self.result
+
+
+def _build(chat_id, summarize):
+    async def scenario():
+        try:
+            async with AsyncSessionLocal() as session:
+                return await build_chat_context(session, chat_id, "новый вопрос", summarize)
+        finally:
+            # Пул aiosqlite привязан к циклу событий, а каждый asyncio.run создает новый
+            await async_engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+def _summary_state(db, chat_id):
+    db.expire_all()
+    chat = db.get(Chat, chat_id)
+    return chat.summary, chat.summary_message_id
+
+
+def test_history_within_budget_is_not_folded(db, user):
+    chat_id, _ = _make_chat(db, user, 3)
+    summarize = Summarizer("summary")
+
+    context = _build(chat_id, summarize)
+
+    assert len(context) == 3
+    assert summarize.calls == []
+    assert _summary_state(db, chat_id) == (None, None)
+
+
+def test_overflow_is_folded_with_margin(db, user):
+    chat_id, ids = _make_chat(db, user, 10)
+    summarize = Summarizer("summary")
+
+    context = _build(chat_id, summarize)
+
+    # В бюджет помещается 7 сообщений, но сворачивается до половины бюджета: 7 старых
+    assert [len(messages) for _, messages in summarize.calls] == [7]
+    assert context[0] == summary_message("summary")
+    assert [message["role"] for message in context[1:]] == ["assistant", "user", "assistant"]
+    assert _summary_state(db, chat_id) == ("summary", ids[6])
+
+
+def test_failed_summarize_still_advances_boundary(db, user):
+    chat_id, ids = _make_chat(db, user, 10)
+    summarize = Summarizer(None)
+
+    context = _build(chat_id, summarize)
+
+    assert len(context) == 7
+    assert _summary_state(db, chat_id) == (None, ids[2])
+
+    # Следующий запрос загружает только то, что помещается в бюджет, и summarize не нужен
+    assert len(_build(chat_id, summarize)) == 7
+    assert len(summarize.calls) == 1
+
+
+def test_history_load_is_bounded(db, user, monkeypatch):
+    # Минимальные сообщения по 5 токенов: в бюджет 100 помещается 20
+    chat_id, _ = _make_chat(db, user, 40, content="x")
+    loaded = []
+    load = context_service.get_chat_context_async
+
+    async def spy(*args, **kwargs):
+        result = await load(*args, **kwargs)
+        loaded.append(len(result[2]))
+        return result
+
+    monkeypatch.setattr(context_service, "get_chat_context_async", spy)
+
+    context = _build(chat_id, Summarizer(None))
+
+    assert loaded == [context_service.context_load_limit(100)] == [21]
+    assert len(context) == 20
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from core.database import Base
+from core.migrations import upgrade_schema
+from crud.chat import add_favorite_book, get_favorite_books, get_favorites_signature, remove_favorite_book
+
+
+def test_repeated_add_updates_instead_of_duplicating(db, user):
+    add_favorite_book(db, user.id, {"id": "book-1", "title": "Дюна"})
+    book = add_favorite_book(db, user.id, {"id": "book-1", "title": "Дюна (переиздание)", "author": "Герберт"})
+
+    assert book.title == "Дюна (переиздание)"
+    assert [(b.book_id, b.title, b.author) for b in get_favorite_books(db, user.id)] == [
+        ("book-1", "Дюна (переиздание)", "Герберт")
+    ]
+
+
+def test_bulk_endpoint_reports_inserted_and_updated(client, auth_headers):
+    url = "/api/v1/users/favorites"
+    client.post(url, json={"id": "book-1", "title": "Дюна"}, headers=auth_headers)
+
+    result = client.post(f"{url}/bulk", headers=auth_headers, json={"books": [
+        {"id": "book-1", "title": "Дюна"},
+        {"id": "book-2", "title": "Солярис"},
+        {"id": "book-2", "title": "Солярис (2-е изд.)"},
+    ]}).json()
+
+    # Дубль внутри запроса схлопывается: побеждает последняя запись
+    assert result == {"received": 3, "inserted": 1, "updated": 1}
+    books = {b["book_id"]: b["title"] for b in client.get(url, headers=auth_headers).json()}
+    assert books == {"book-1": "Дюна", "book-2": "Солярис (2-е изд.)"}
+
+
+def test_migration_removes_duplicates_before_unique_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Схема до уникального индекса: дубли были возможны
+        conn.execute(text("DROP INDEX ux_favorite_books_user_book"))
+        for user_id, book_id, title in [(1, "a", "first"), (1, "a", "second"), (1, "b", "b"), (2, "a", "other")]:
+            conn.execute(
+                text("INSERT INTO favorite_books (user_id, book_id, title) VALUES (:u, :b, :t)"),
+                {"u": user_id, "b": book_id, "t": title}
+            )
+
+    upgrade_schema(engine)
+
+    with engine.begin() as conn:
+        rows = conn.execute(text("SELECT user_id, book_id, title FROM favorite_books ORDER BY id")).all()
+    # Остается самая ранняя запись пары
+    assert [tuple(row) for row in rows] == [(1, "a", "first"), (1, "b", "b"), (2, "a", "other")]
+    assert "ux_favorite_books_user_book" in {i["name"] for i in inspect(engine).get_indexes("favorite_books")}
+    with pytest.raises(IntegrityError), engine.begin() as conn:
+        conn.execute(text("INSERT INTO favorite_books (user_id, book_id, title) VALUES (1, 'a', 'again')"))
+    engine.dispose()
+
+
+def test_signature_changes_on_in_place_updates_and_rowid_reuse(db, user):
+    add_favorite_book(db, user.id, {"id": "book-1", "title": "Дюна"})
+    signatures = [get_favorites_signature(db)]
+
+    # Обновление на месте: число строк и максимальный id не меняются
+    add_favorite_book(db, user.id, {"id": "book-1", "title": "Дюна (переиздание)"})
+    signatures.append(get_favorites_signature(db))
+
+    # SQLite отдает освободившийся максимальный rowid новой строке
+    remove_favorite_book(db, user.id, "book-1")
+    add_favorite_book(db, user.id, {"id": "book-2", "title": "Солярис"})
+    signatures.append(get_favorites_signature(db))
+
+    assert len(set(signatures)) == len(signatures)
@@ -0,0 +1,46 @@
+def _etag(client, url, headers):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    # Неизмененный ресурс: тот же ETag дает 304 без тела
+    cached = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    return etag
+
+
+def test_chat_writes_change_etags(client, auth_headers):
+    chats_url = "/api/v1/chat/chats"
+    chats_etag = _etag(client, chats_url, auth_headers)
+
+    # Создание чата увеличивает users.chats_version
+    chat_id = client.post(chats_url, json={"title": "Первый"}, headers=auth_headers).json()["id"]
+    chat_url = f"{chats_url}/{chat_id}"
+    stale = client.get(chats_url, headers={**auth_headers, "If-None-Match": chats_etag})
+    assert stale.status_code == 200
+    chats_etag = _etag(client, chats_url, auth_headers)
+    chat_etag = _etag(client, chat_url, auth_headers)
+
+    # Переименование увеличивает и chats.version, и users.chats_version
+    assert client.put(chat_url, params={"title": "Второй"}, headers=auth_headers).status_code == 200
+    renamed = client.get(chat_url, headers={**auth_headers, "If-None-Match": chat_etag})
+    assert renamed.status_code == 200
+    assert renamed.json()["title"] == "Второй"
+    assert _etag(client, chat_url, auth_headers) != chat_etag
+    assert _etag(client, chats_url, auth_headers) != chats_etag
+
+
+def test_favorite_writes_change_etag(client, auth_headers):
+    url = "/api/v1/users/favorites"
+    etags = [_etag(client, url, auth_headers)]
+
+    # Каждая запись увеличивает users.favorites_version
+    client.post(url, json={"id": "book-1", "title": "Дюна"}, headers=auth_headers)
+    etags.append(_etag(client, url, auth_headers))
+    client.post(f"{url}/bulk", json={"books": [{"id": "book-2", "title": "Солярис"}]}, headers=auth_headers)
+    etags.append(_etag(client, url, auth_headers))
+    assert client.delete(f"{url}/book-1", headers=auth_headers).status_code == 200
+    etags.append(_etag(client, url, auth_headers))
+
+    assert len(set(etags)) == len(etags)
+    assert [book["book_id"] for book in client.get(url, headers=auth_headers).json()] == ["book-2"]
@@ -0,0 +1,48 @@
+import asyncio
+import httpx
+
+from app import app
+from core import http_client
+from services.book_service import search_books
+
+class RecordingTransport(httpx.MockTransport):
+    """
+    Заглушка Google Books: запоминает запросы и закрытие
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.closed = False
+        super().__init__(self._handle)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(200, json={"items": []})
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+def test_shared_client_is_reused_and_closed_on_shutdown():
+    transport = RecordingTransport()
+
+    async def scenario():
+        async with app.router.lifespan_context(app):
+            await http_client.init_http_clients(transport=transport)
+            client = http_client.get_books_client()
+
+            await search_books("дюна")
+            await search_books("солярис")
+
+            # Оба запроса прошли через один общий клиент и его пул
+            assert http_client.get_books_client() is client
+            assert [request.url.params["q"] for request in transport.requests] == ["дюна", "солярис"]
+            assert all(request.url.host == "www.googleapis.com" for request in transport.requests)
+            assert not client.is_closed
+        return client
+
+    client = asyncio.run(scenario())
+
+    assert client.is_closed
+    assert transport.closed
+    assert http_client._clients == {}
+    assert http_client._transport is None
@@ -0,0 +1,47 @@
+import time
+
+from core.principal_cache import PrincipalCache, UserSnapshot
+
+
+def _snapshot(username):
+    return UserSnapshot(
+        id=1, username=username, email=f"{username}@example.com", full_name=None,
+        is_active=True, created_at=None, updated_at=None
+    )
+
+
+def _put(cache, username):
+    cache.put(f"token-{username}", _snapshot(username), cache.version(username), expires_at=time.time() + 60)
+
+
+def test_invalidation_drops_cached_and_in_flight_snapshots():
+    cache = PrincipalCache(max_size=10, ttl=60)
+    _put(cache, "alice")
+    version = cache.version("alice")
+
+    cache.invalidate_user("alice")
+
+    assert cache.get("token-alice") is None
+    # Снимок, прочитанный из БД до инвалидации, в кэш не попадает
+    cache.put("token-alice", _snapshot("alice"), version, expires_at=time.time() + 60)
+    assert cache.get("token-alice") is None
+    _put(cache, "alice")
+    assert cache.get("token-alice") == _snapshot("alice")
+
+
+def test_overflowing_invalidations_do_not_resurrect_stale_snapshots():
+    cache = PrincipalCache(max_size=2, ttl=60)
+    for username in ("alice", "bob", "carol"):
+        _put(cache, username)
+    in_flight = cache.version("alice")
+
+    for username in ("alice", "bob", "carol"):
+        cache.invalidate_user(username)
+
+    # Отметка alice вытеснена, но ее снимок все равно устарел
+    assert cache.stats()["tracked_invalidations"] == 2
+    assert [cache.get(f"token-{name}") for name in ("alice", "bob", "carol")] == [None, None, None]
+    cache.put("token-alice", _snapshot("alice"), in_flight, expires_at=time.time() + 60)
+    assert cache.get("token-alice") is None
+    _put(cache, "alice")
+    assert cache.get("token-alice") == _snapshot("alice")
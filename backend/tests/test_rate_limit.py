@@ -0,0 +1,40 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from api import dependencies
+from core import rate_limit
+from core.rate_limit import Budget, MemoryBackend, RateLimiter
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    # 15 секунд от начала минутного окна
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=lambda: 600.0 + 15, monotonic=time.monotonic))
+
+
+def test_exceeded_budget_returns_429_with_retry_after(client, auth_headers, frozen_time, monkeypatch):
+    limiter = RateLimiter({"read": Budget("read", 2, 0, 60.0)}, MemoryBackend())
+    monkeypatch.setattr(dependencies, "rate_limiter", limiter)
+
+    assert [client.get("/api/v1/users/me", headers=auth_headers).status_code for _ in range(2)] == [200, 200]
+    rejected = client.get("/api/v1/users/me", headers=auth_headers)
+
+    assert rejected.status_code == 429
+    # Текущее окно заполнено: ждать до его конца (45 с) — затем вес предыдущего окна уже ниже лимита
+    assert rejected.headers["Retry-After"] == "45"
+
+
+def test_memory_backend_evicts_least_recently_used_keys(frozen_time):
+    backend = MemoryBackend(max_keys=3)
+
+    async def scenario():
+        for key in ("a", "b", "c", "a", "d", "e"):
+            await backend.hit(key, 10, 60.0)
+
+    asyncio.run(scenario())
+
+    assert list(backend._windows) == ["a", "d", "e"]
+    assert backend.stats()["keys"] == 3
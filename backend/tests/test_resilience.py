@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from core.resilience import CircuitBreaker, UpstreamGuard, UpstreamUnavailable
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def _guard(clock: FakeClock, max_concurrency: int = 1) -> UpstreamGuard:
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30, half_open_max_calls=1, clock=clock)
+    return UpstreamGuard("test", max_concurrency=max_concurrency, acquire_timeout=0, breaker=breaker)
+
+async def _fail(guard: UpstreamGuard) -> None:
+    with pytest.raises(RuntimeError):
+        async with guard:
+            raise RuntimeError("5xx")
+
+def test_breaker_transitions():
+    async def scenario():
+        clock = FakeClock()
+        guard = _guard(clock)
+        breaker = guard.breaker
+
+        await _fail(guard)
+        assert breaker.state == CircuitBreaker.CLOSED
+        await _fail(guard)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.opened_count == 1
+
+        # Пока не прошел recovery_timeout, вызовы отклоняются без попытки
+        clock.now += 29
+        with pytest.raises(UpstreamUnavailable):
+            async with guard:
+                pass
+        assert guard.short_circuited == 1
+
+        # После таймаута — один пробный вызов; неудача снова размыкает цепь
+        clock.now += 2
+        await _fail(guard)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.opened_count == 2
+
+        clock.now += 31
+        async with guard:
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            # Второй пробный вызов, пока первый не завершился, не пропускается
+            assert not breaker.allow()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.consecutive_failures == 0
+
+    asyncio.run(scenario())
+
+def test_cancellation_releases_slot_without_counting_failure():
+    async def scenario():
+        clock = FakeClock()
+        guard = _guard(clock, max_concurrency=1)
+        entered = asyncio.Event()
+
+        async def call():
+            async with guard:
+                entered.set()
+                await asyncio.sleep(3600)
+
+        task = asyncio.create_task(call())
+        await entered.wait()
+        # Слот занят: при acquire_timeout=0 второй вызов отклоняется сразу
+        with pytest.raises(UpstreamUnavailable):
+            async with guard:
+                pass
+        assert guard.rejected == 1
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert guard.in_flight == 0
+        assert guard.failures == 0
+        assert guard.breaker.consecutive_failures == 0
+
+        async with guard:
+            pass
+        assert guard.successes == 1
+
+    asyncio.run(scenario())
+
+def test_cancelled_probe_frees_half_open_slot():
+    async def scenario():
+        clock = FakeClock()
+        guard = _guard(clock)
+        await _fail(guard)
+        await _fail(guard)
+        clock.now += 31
+
+        async def probe():
+            async with guard:
+                await asyncio.sleep(3600)
+
+        task = asyncio.create_task(probe())
+        await asyncio.sleep(0)
+        assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # Отмененный пробный вызов не занимает место: следующий проходит и замыкает цепь
+        async with guard:
+            pass
+        assert guard.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
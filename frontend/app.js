@@ -382,9 +382,13 @@ async function sendMessage() {
     addMessage(message, true);
     messageInput.value = '';
     
-    // Отправляем сообщение на API
+    // Отправляем сообщение на API (потоково, если браузер поддерживает ReadableStream)
     try {
-        await sendMessageToApi(message);
+        if (window.ReadableStream && window.TextDecoder) {
+            await sendMessageToApiStream(message);
+        } else {
+            await sendMessageToApi(message);
+        }
     } catch (error) {
         console.error('Ошибка отправки сообщения:', error);
         addMessage("Извините, произошла ошибка. Пожалуйста, попробуйте еще раз.", false);
@@ -444,6 +448,102 @@ async function sendMessageToApi(message) {
     }
 }
 
+// Потоковая отправка сообщения на API (Server-Sent Events)
+async function sendMessageToApiStream(message) {
+    let botMessageText = null;
+    let responseText = '';
+    
+    try {
+        isTyping = true;
+        showTypingIndicator();
+        
+        const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream',
+                'Authorization': `Bearer ${accessToken}`
+            },
+            body: JSON.stringify({
+                message: message,
+                chat_id: currentChatId
+            })
+        });
+        
+        if (!response.ok) {
+            if (response.status === 401) {
+                handleLogout();
+                throw new Error('Сессия истекла. Пожалуйста, войдите снова.');
+            }
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(errorData.detail || `Ошибка сервера: ${response.status}`);
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            
+            // События SSE разделяются пустой строкой
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let eventName = 'message';
+                let data = '';
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) {
+                        eventName = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        data += line.slice(5).trim();
+                    }
+                });
+                if (!data) continue;
+                const payload = JSON.parse(data);
+                
+                if (eventName === 'chat') {
+                    currentChatId = payload.chat_id;
+                } else if (eventName === 'recommendations') {
+                    if (payload && payload.length > 0) {
+                        // Очищаем старые рекомендации
+                        recommendationsList.innerHTML = '';
+                        payload.forEach(book => {
+                            addBookSuggestion(book);
+                        });
+                    }
+                } else if (eventName === 'token') {
+                    if (!botMessageText) {
+                        hideTypingIndicator();
+                        botMessageText = addMessage('', false).querySelector('.message-text');
+                    }
+                    responseText += payload;
+                    botMessageText.textContent = responseText;
+                    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+                }
+            }
+        }
+        
+        hideTypingIndicator();
+        isTyping = false;
+        
+        // Обновляем счетчик сообщений
+        document.getElementById('message-count').textContent = 
+            parseInt(document.getElementById('message-count').textContent) + 1;
+        
+    } catch (error) {
+        hideTypingIndicator();
+        isTyping = false;
+        console.error('Ошибка при отправке сообщения:', error);
+        addMessage(error.message || "Извините, произошла ошибка. Пожалуйста, попробуйте еще раз.", false);
+    }
+}
+
 // Добавление сообщения в чат
 function addMessage(text, isUser) {
     const messageDiv = document.createElement('div');
@@ -472,6 +572,7 @@ function addMessage(text, isUser) {
     
     messagesContainer.appendChild(messageDiv);
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    return messageDiv;
 }
 
 // Добавление рекомендации книги
@@ -614,15 +715,16 @@ function validateEmail(email) {
 // Загрузка истории чатов
 async function loadChatHistory() {
     try {
-        const response = await fetch(`${API_BASE_URL}/chat/chats`, {
+        // Краткий список чатов без загрузки всех сообщений
+        const response = await fetch(`${API_BASE_URL}/chat/chats/summary`, {
             headers: {
                 'Authorization': `Bearer ${accessToken}`
             }
         });
         
         if (response.ok) {
-            const chats = await response.json();
-            displayChatHistory(chats);
+            const page = await response.json();
+            displayChatHistory(page.items);
         }
     } catch (error) {
         console.error('Ошибка загрузки истории:', error);